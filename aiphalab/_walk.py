@@ -0,0 +1,58 @@
+# aiphalab/_walk.py
+"""
+Walker compartido basado en os.scandir.
+
+VENTAJA sobre Path.rglob: DirEntry trae el tipo de archivo cacheado
+desde el getdents64/FindFirstFile del directorio, así que distinguir
+archivo/directorio no cuesta un stat() extra por entrada (~3 syscalls
+por archivo → ~1 por directorio).
+"""
+
+import fnmatch
+import os
+import re
+from typing import Iterator
+
+# Directorios que nunca contienen código analizable
+_SKIP_DIRS = {'.git', '__pycache__', '.venv', 'venv', 'node_modules', 'snapshots'}
+
+
+def iter_entries(base: str) -> Iterator[os.DirEntry]:
+    """Itera todos los archivos bajo base con una pila de os.scandir"""
+    stack = [str(base)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in _SKIP_DIRS:
+                                stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def walk_repo(base, pattern: str = "*.py") -> Iterator[str]:
+    """
+    Yield de rutas relativas a base que cumplen el patrón.
+
+    El patrón glob se traduce a regex UNA vez (no por archivo). Para el
+    caso común "*.ext" se usa str.endswith directamente — en Windows el
+    nombre viene prefetcheado del FindNextFileW batcheado, así que el
+    filtro entero queda sin syscalls.
+    """
+    base_str = str(base)
+    if pattern.startswith('*.') and not any(c in pattern[2:] for c in '*?['):
+        suffix = pattern[1:]
+        for entry in iter_entries(base_str):
+            if entry.name.endswith(suffix):
+                yield os.path.relpath(entry.path, base_str)
+        return
+    match = re.compile(fnmatch.translate(pattern)).match
+    for entry in iter_entries(base_str):
+        if match(entry.name):
+            yield os.path.relpath(entry.path, base_str)
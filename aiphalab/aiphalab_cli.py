@@ -10,6 +10,7 @@ Soporta: Gemini (Google) y Moonshot AI (Kimi)
 
 import os
 import sys
+import functools
 from pathlib import Path
 from typing import Optional, Dict, Any, Union
 import json
@@ -159,18 +160,31 @@ class GeminiProvider(LLMProvider):
         response = self.client.generate_content(prompt)
         return response.text
 
+@functools.lru_cache(maxsize=4)
+def _moonshot_client(api_key: str):
+    """
+    Cliente OpenAI compartido por api_key.
+
+    VENTAJA: crear openai.OpenAI monta contexto TLS y pool de conexiones
+    (~100-300 ms); el singleton mantiene viva la sesión entre sondas y
+    re-instanciaciones del proveedor. timeout corto para fallar rápido
+    en vez del timeout de socket por defecto.
+    """
+    import openai
+    return openai.OpenAI(
+        api_key=api_key,
+        base_url="https://api.moonshot.cn/v1",
+        timeout=10.0
+    )
+
 class MoonshotProvider(LLMProvider):
     """Proveedor para Moonshot AI (Kimi)"""
     
     def __init__(self, api_key: str, model: str = "kimi-k2-thinking"):
         super().__init__(api_key, model)
         try:
-            import openai
             # Moonshot usa API compatible con OpenAI
-            self.client = openai.OpenAI(
-                api_key=api_key,
-                base_url="https://api.moonshot.cn/v1"
-            )
+            self.client = _moonshot_client(api_key)
         except ImportError:
             raise ImportError("openai no instalado. Usa: pip install openai")
     
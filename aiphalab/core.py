@@ -13,6 +13,271 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 
+# orjson es opcional: serializa 2-5x más rápido que el json de stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps_bytes(obj) -> bytes:
+    """Serializar a bytes JSON (orjson si está disponible)"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+def _dumps_canonical(obj) -> bytes:
+    """Serialización canónica (claves ordenadas) para hashing estable"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False).encode('utf-8')
+
+
+# === ANÁLISIS AST COMO FUNCIONES PURAS ===
+# Funciones a nivel módulo (sin self, sin estado) para que sean picklables
+# y puedan ejecutarse en un ProcessPoolExecutor durante análisis masivos.
+
+def _get_node_name(node) -> str:
+    """Obtiene el nombre de un nodo AST"""
+    if isinstance(node, ast.Name):
+        return node.id
+    elif isinstance(node, ast.Attribute):
+        return f"{_get_node_name(node.value)}.{node.attr}"
+    return str(type(node).__name__)
+
+
+def _get_annotation(node) -> Optional[str]:
+    """Obtiene anotación de tipo"""
+    if isinstance(node, ast.Name):
+        return node.id
+    elif isinstance(node, ast.Subscript):
+        return f"{_get_node_name(node.value)}[...]"
+    return None
+
+
+def _get_constant_value(node) -> Any:
+    """Extrae valor de una constante (si es simple)"""
+    if isinstance(node, (ast.Str, ast.Num)):
+        return node.n if isinstance(node, ast.Num) else node.s
+    elif isinstance(node, ast.Constant):
+        return node.value
+    return "<complex>"
+
+
+def _estimate_complexity(tree) -> int:
+    """Estimación simple de complejidad ciclomática"""
+    complexity = 1  # Base
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.If, ast.While, ast.For, ast.ExceptHandler)):
+            complexity += 1
+        elif isinstance(node, ast.BoolOp):
+            complexity += len(node.values) - 1
+
+    return complexity
+
+
+def analyze_python_source(file_path: Path, content: str) -> Dict[str, Any]:
+    """
+    Análisis profundo de archivo Python (función pura).
+
+    Extraída de Core.analyze_python_file para poder ejecutarse en
+    procesos worker sin serializar la instancia completa.
+    """
+    try:
+        tree = ast.parse(content)
+
+        analysis = {
+            'classes': [],
+            'functions': [],
+            'imports': [],
+            'constants': [],
+            'decorators': [],
+            'docstrings': {}
+        }
+
+        # Extraer docstring del módulo
+        if (ast.get_docstring(tree)):
+            analysis['docstrings']['module'] = ast.get_docstring(tree)
+
+        # Módulos importados, deduplicados una sola vez aquí (set
+        # incremental) en lugar de en cada render del contexto
+        seen_modules = set()
+
+        # Recorrido dirigido: solo tree.body (+ cuerpos de clase), no
+        # ast.walk — que visita cada Name/Constant/BinOp del archivo
+        # (miles de nodos) para quedarse con 4 tipos de statement.
+        # También evita los _is_module_level por nodo (O(N) cada uno).
+        for node in tree.body:
+            # Clases
+            if isinstance(node, ast.ClassDef):
+                class_info = {
+                    'name': node.name,
+                    'bases': [_get_node_name(base) for base in node.bases],
+                    'methods': [],
+                    'decorators': [_get_node_name(d) for d in node.decorator_list]
+                }
+
+                # Docstring de clase (+ versión truncada precomputada
+                # para el render del contexto: evita el slice por render)
+                docstring = ast.get_docstring(node)
+                if docstring:
+                    analysis['docstrings'][node.name] = docstring
+                    class_info['doc_80'] = docstring[:80]
+
+                # Métodos de la clase
+                for item in node.body:
+                    if isinstance(item, ast.FunctionDef):
+                        class_info['methods'].append(item.name)
+
+                analysis['classes'].append(class_info)
+
+            # Funciones (nivel módulo)
+            elif isinstance(node, ast.FunctionDef):
+                func_info = {
+                    'name': node.name,
+                    'params': [arg.arg for arg in node.args.args],
+                    'decorators': [_get_node_name(d) for d in node.decorator_list],
+                    'returns': _get_annotation(node.returns) if node.returns else None
+                }
+
+                # Docstring de función
+                docstring = ast.get_docstring(node)
+                if docstring:
+                    analysis['docstrings'][node.name] = docstring
+                    func_info['doc_80'] = docstring[:80]
+
+                analysis['functions'].append(func_info)
+
+            # Imports
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    analysis['imports'].append({
+                        'module': alias.name,
+                        'alias': alias.asname,
+                        'type': 'import'
+                    })
+                    seen_modules.add(alias.name)
+
+            elif isinstance(node, ast.ImportFrom):
+                if node.module:
+                    for alias in node.names:
+                        analysis['imports'].append({
+                            'module': node.module,
+                            'name': alias.name,
+                            'alias': alias.asname,
+                            'type': 'from'
+                        })
+                    seen_modules.add(node.module)
+
+            # Constantes (asignaciones nivel módulo)
+            elif isinstance(node, ast.Assign):
+                for target in node.targets:
+                    if isinstance(target, ast.Name) and target.id.isupper():
+                        analysis['constants'].append({
+                            'name': target.id,
+                            'value': _get_constant_value(node.value)
+                        })
+
+        analysis['imports_flat'] = sorted(seen_modules)
+
+        # Estadísticas
+        analysis['stats'] = {
+            'lines_of_code': len(content.splitlines()),
+            'file_size': len(content),
+            'complexity': _estimate_complexity(tree)
+        }
+
+        return analysis
+
+    except Exception as e:
+        return {
+            'error': str(e),
+            'file_path': str(file_path)
+        }
+
+
+# Claves de una entrada en orden canónico (sorted). add_entry construye
+# los dicts en este orden exacto, así el hash no tiene que re-ordenar
+# claves en cada llamada (O(k log k) por entrada ahorrado en el hot path).
+_ENTRY_KEYS = (
+    'action', 'agent', 'component', 'details',
+    'entry_category', 'entry_id', 'previous_entry_hash',
+    'source_component', 'status', 'timestamp', 'version_id', 'entry_hash'
+)
+_HASH_KEYS = tuple(k for k in _ENTRY_KEYS if k != 'entry_hash')
+_KEY_SET = frozenset(_ENTRY_KEYS)
+
+
+def _hash_entry(entry: Dict[str, Any]) -> str:
+    """
+    Hash SHA-256 canónico de una entrada (función pura, picklable).
+
+    A nivel módulo para que verify_integrity pueda recalcular hashes
+    en paralelo con un ProcessPoolExecutor. Para entradas con el esquema
+    estándar usa _HASH_KEYS precomputado; solo entradas ajenas al
+    esquema pagan el sorted().
+    """
+    if entry.keys() == _KEY_SET:
+        keys = _HASH_KEYS
+    else:
+        keys = [k for k in sorted(entry) if k != 'entry_hash']
+    h = hashlib.sha256()
+    for key in keys:
+        h.update(key.encode())
+        h.update(b'\x1f')
+        h.update(_dumps_canonical(entry[key]))
+        h.update(b'\x1e')
+    return h.hexdigest()
+
+
+def parse_py(file_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Lee y analiza un archivo Python (función pura para worker pools).
+
+    Sin estado compartido: ideal para ProcessPoolExecutor.map.
+    Devuelve None si el archivo no se puede leer.
+
+    Lectura con os.open/os.read crudos: un solo read() del tamaño exacto
+    (fstat), sin la capa de buffering de io.BufferedReader.
+    """
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            content = os.read(fd, size).decode('utf-8', errors='replace')
+        finally:
+            os.close(fd)
+    except OSError:
+        return None
+    return analyze_python_source(Path(file_path), content)
+
+
+def parse_py_keyed(file_path: str) -> Optional[tuple]:
+    """
+    Como parse_py, pero devuelve (clave_de_cache, análisis).
+
+    La clave "mtime_ns:size:sha256" es la misma que usa el cache
+    incremental; calcularla en el worker (que ya tiene los bytes y el
+    fstat en mano) permite al análisis forzado poblar el cache sin
+    re-leer ni re-hashear nada en el proceso principal.
+    """
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            st = os.fstat(fd)
+            data = os.read(fd, st.st_size)
+        finally:
+            os.close(fd)
+    except OSError:
+        return None
+    sha = hashlib.sha256(data).hexdigest()
+    cache_key = f"{st.st_mtime_ns}:{st.st_size}:{sha}"
+    content = data.decode('utf-8', errors='replace')
+    return cache_key, analyze_python_source(Path(file_path), content)
+
+
 class Core:
     """
     Core de Shadow - Solo análisis especializado
@@ -23,64 +288,218 @@ class Core:
     - Delega el resto: lectura, búsqueda, cache a MCPs
     """
     
-    def __init__(self, memory_file: str = "aiphalab_memory.json"):
+    # Flush del file handle cada K appends (amortiza syscalls)
+    FLUSH_EVERY = 32
+
+    def __init__(self, memory_file: str = "aiphalab_memory.jsonl"):
         self.memory_file = Path(memory_file)
+        self._fp = None              # handle append-only, abierto perezosamente
+        self._appends_since_flush = 0
         self.memory = self._load_memory()
-    
+        self._persisted = len(self.memory)  # entradas ya escritas a disco
+
+        # Índices categoría/componente -> posiciones en self.memory.
+        # Mantenidos en cada add_entry: las consultas pasan de O(N) a
+        # O(resultado) sin re-escanear el log completo.
+        self._by_category: Dict[str, List[int]] = {}
+        self._by_component: Dict[str, List[int]] = {}
+        for idx, entry in enumerate(self.memory):
+            self._index_entry(idx, entry)
+
+    def _index_entry(self, idx: int, entry: Dict[str, Any]):
+        """Registrar una entrada en los índices de consulta"""
+        self._by_category.setdefault(
+            entry.get('entry_category', 'UNKNOWN'), []).append(idx)
+        self._by_component.setdefault(
+            entry.get('component', 'UNKNOWN'), []).append(idx)
+
     def _load_memory(self) -> List[Dict[str, Any]]:
-        """Cargar memoria desde archivo"""
+        """Cargar memoria desde archivo (JSONL, con fallback a JSON legacy)"""
         try:
-            if self.memory_file.exists():
-                with open(self.memory_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            source = self.memory_file
+            if not source.exists():
+                # Migración: instalaciones previas guardaban la memoria en
+                # el hermano .json (array completo); leerlo para no
+                # arrancar con memoria vacía tras el cambio de nombre
+                legacy = source.with_suffix('.json')
+                if source.suffix != '.jsonl' or not legacy.exists():
+                    return []
+                source = legacy
+            raw = source.read_bytes()
+            if not raw.strip():
+                return []
+            loads = orjson.loads if orjson is not None else json.loads
+            if raw.lstrip()[:1] == b'[':
+                # Formato legacy (array JSON completo): migrar a JSONL
+                memory = loads(raw)
+                self._rewrite_as_jsonl(memory)
+                return memory
+            memory = [loads(line) for line in raw.splitlines() if line.strip()]
+            if source is not self.memory_file:
+                # Venía del .json legacy: persistir en el .jsonl nuevo para
+                # que los appends posteriores no dejen atrás estas entradas
+                self._rewrite_as_jsonl(memory)
+            return memory
+        except (OSError, ValueError):
             return []
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
-    
+
+    def _rewrite_as_jsonl(self, memory: List[Dict[str, Any]]):
+        """Reescribir el archivo completo en formato JSONL"""
+        self._close_fp()
+        with open(self.memory_file, 'wb') as f:
+            for entry in memory:
+                f.write(_dumps_bytes(entry) + b'\n')
+
+    def _append_entry(self, entry: Dict[str, Any]):
+        """
+        Añadir UNA entrada al log en disco (append-only).
+
+        VENTAJA: O(bytes de la entrada) por append en vez de reescribir
+        el archivo completo (O(total)) en cada add_entry.
+        """
+        if self._fp is None:
+            self._fp = open(self.memory_file, 'ab')
+        self._fp.write(_dumps_bytes(entry) + b'\n')
+        self._appends_since_flush += 1
+        if self._appends_since_flush >= self.FLUSH_EVERY:
+            self._fp.flush()
+            self._appends_since_flush = 0
+
+    def _close_fp(self):
+        if self._fp is not None:
+            self._fp.flush()
+            self._fp.close()
+            self._fp = None
+            self._appends_since_flush = 0
+
+    def close(self):
+        """Cerrar el handle del log asegurando flush final"""
+        self._close_fp()
+
+    def compact(self):
+        """Reescritura completa del log (raramente necesaria)"""
+        self._rewrite_as_jsonl(self.memory)
+        self._persisted = len(self.memory)
+
     def _save_memory(self):
-        """Guardar memoria a archivo"""
-        with open(self.memory_file, 'w', encoding='utf-8') as f:
-            json.dump(self.memory, f, indent=2, ensure_ascii=False)
+        """Guardar memoria a archivo (reescritura completa, legacy)"""
+        self.compact()
     
     def _calculate_hash(self, entry: Dict) -> str:
-        """Calcular hash SHA-256 de una entrada"""
-        entry_for_hash = {k: v for k, v in entry.items() if k != 'entry_hash'}
-        content = json.dumps(entry_for_hash, sort_keys=True, ensure_ascii=False)
-        return hashlib.sha256(content.encode()).hexdigest()
+        """
+        Calcular hash SHA-256 de una entrada.
+
+        Streaming: alimenta el hasher campo a campo (API C de hashlib)
+        en vez de construir un dict intermedio y serializar todo el
+        entry con sort_keys=True en una sola string gigante.
+        """
+        return _hash_entry(entry)
     
+    def verify_integrity(self) -> Dict[str, Any]:
+        """
+        Verificar la cadena de hashes de toda la memoria.
+
+        Los hashes son independientes entre sí: se recalculan en paralelo
+        (ProcessPoolExecutor) y solo la comparación de eslabones es
+        secuencial — una pasada O(N) sobre strings.
+        """
+        if not self.memory:
+            return {'valid': True, 'entries': 0, 'errors': []}
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        if len(self.memory) > 512:
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+                expected = list(pool.map(_hash_entry, self.memory, chunksize=256))
+        else:
+            # Pools no compensan en memorias pequeñas
+            expected = [_hash_entry(e) for e in self.memory]
+
+        # Comparación por lotes: las listas se materializan con
+        # comprehensions (bucle en C) y el caso sano — sin errores —
+        # se resuelve con dos comparaciones de lista a velocidad C,
+        # sin iterar entrada a entrada en bytecode Python.
+        stored = [e.get('entry_hash', '') for e in self.memory]
+        prev = [e.get('previous_entry_hash', '') for e in self.memory]
+        chain = [''] + expected[:-1]
+
+        errors = []
+        if stored != expected or prev != chain:
+            for i in range(len(self.memory)):
+                if stored[i] != expected[i]:
+                    errors.append({'index': i, 'error': 'hash_mismatch'})
+                if prev[i] != chain[i]:
+                    errors.append({'index': i, 'error': 'chain_broken'})
+
+        return {'valid': not errors, 'entries': len(self.memory), 'errors': errors}
+
     def _get_previous_hash(self) -> str:
         """Obtener hash de la entrada anterior"""
         if not self.memory:
             return ""
         return self.memory[-1].get('entry_hash', '')
     
-    def add_entry(self, action: str, component: str, details: Dict, 
-                  category: str = "SYSTEM_EVENT") -> str:
+    def add_entry(self, action: str, component: str, details: Dict,
+                  category: str = "SYSTEM_EVENT", flush: bool = True) -> str:
         """
         Agregar entrada a la memoria
-        
-        MEJORA: Ahora con timestamps más precisos y metadata rica
+
+        MEJORA: Ahora con timestamps más precisos y metadata rica.
+        Con flush=False la entrada se acumula en memoria y el llamador
+        es responsable de invocar flush() al final (análisis masivos).
         """
+        # Claves en orden canónico (_ENTRY_KEYS): el hash itera el dict
+        # tal cual sin re-ordenar
         entry = {
-            "entry_id": str(uuid.uuid4()),
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "version_id": "AiphaLab_1.0",
-            "source_component": component,
-            "entry_category": category,
             "action": action,
             "agent": "Core",
             "component": component,
-            "status": "success",
             "details": details,
-            "data_payload": details,
+            "entry_category": category,
+            "entry_id": str(uuid.uuid4()),
             "previous_entry_hash": self._get_previous_hash(),
+            "source_component": component,
+            "status": "success",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "version_id": "AiphaLab_1.0",
             "entry_hash": ""
         }
-        
+
         entry["entry_hash"] = self._calculate_hash(entry)
         self.memory.append(entry)
-        self._save_memory()
+        self._index_entry(len(self.memory) - 1, entry)
+        if flush:
+            self.flush()
         return entry["entry_hash"]
+
+    def _add_entries_bulk(self, entries: List[Dict[str, Any]]) -> List[str]:
+        """
+        Agregar múltiples entradas en lote con un único flush a disco.
+
+        Cada dict debe tener: action, component, details y opcionalmente
+        category. El hash chain se calcula en un bucle cerrado y
+        _save_memory se invoca exactamente una vez.
+        """
+        hashes = []
+        for spec in entries:
+            hashes.append(self.add_entry(
+                action=spec['action'],
+                component=spec['component'],
+                details=spec['details'],
+                category=spec.get('category', 'SYSTEM_EVENT'),
+                flush=False
+            ))
+        self.flush()
+        return hashes
+
+    def flush(self):
+        """Persistir las entradas pendientes (append-only, sin reescritura)"""
+        for entry in self.memory[self._persisted:]:
+            self._append_entry(entry)
+        self._persisted = len(self.memory)
+        if self._fp is not None:
+            self._fp.flush()
+            self._appends_since_flush = 0
     
     def analyze_python_file(self, file_path: Path, content: str) -> Dict[str, Any]:
         """
@@ -93,152 +512,32 @@ class Core:
         - Detecta tipos (type hints)
         - Extrae constantes
         """
-        try:
-            tree = ast.parse(content)
-            
-            analysis = {
-                'classes': [],
-                'functions': [],
-                'imports': [],
-                'constants': [],
-                'decorators': [],
-                'docstrings': {}
-            }
-            
-            # Extraer docstring del módulo
-            if (ast.get_docstring(tree)):
-                analysis['docstrings']['module'] = ast.get_docstring(tree)
-            
-            for node in ast.walk(tree):
-                # Clases
-                if isinstance(node, ast.ClassDef):
-                    class_info = {
-                        'name': node.name,
-                        'bases': [self._get_node_name(base) for base in node.bases],
-                        'methods': [],
-                        'decorators': [self._get_node_name(d) for d in node.decorator_list]
-                    }
-                    
-                    # Docstring de clase
-                    docstring = ast.get_docstring(node)
-                    if docstring:
-                        analysis['docstrings'][node.name] = docstring
-                    
-                    # Métodos de la clase
-                    for item in node.body:
-                        if isinstance(item, ast.FunctionDef):
-                            class_info['methods'].append(item.name)
-                    
-                    analysis['classes'].append(class_info)
-                
-                # Funciones (nivel módulo)
-                elif isinstance(node, ast.FunctionDef) and self._is_module_level(node, tree):
-                    func_info = {
-                        'name': node.name,
-                        'params': [arg.arg for arg in node.args.args],
-                        'decorators': [self._get_node_name(d) for d in node.decorator_list],
-                        'returns': self._get_annotation(node.returns) if node.returns else None
-                    }
-                    
-                    # Docstring de función
-                    docstring = ast.get_docstring(node)
-                    if docstring:
-                        analysis['docstrings'][node.name] = docstring
-                    
-                    analysis['functions'].append(func_info)
-                
-                # Imports
-                elif isinstance(node, ast.Import):
-                    for alias in node.names:
-                        analysis['imports'].append({
-                            'module': alias.name,
-                            'alias': alias.asname,
-                            'type': 'import'
-                        })
-                
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module:
-                        for alias in node.names:
-                            analysis['imports'].append({
-                                'module': node.module,
-                                'name': alias.name,
-                                'alias': alias.asname,
-                                'type': 'from'
-                            })
-                
-                # Constantes (asignaciones nivel módulo)
-                elif isinstance(node, ast.Assign) and self._is_module_level(node, tree):
-                    for target in node.targets:
-                        if isinstance(target, ast.Name) and target.id.isupper():
-                            analysis['constants'].append({
-                                'name': target.id,
-                                'value': self._get_constant_value(node.value)
-                            })
-            
-            # Estadísticas
-            analysis['stats'] = {
-                'lines_of_code': len(content.splitlines()),
-                'file_size': len(content),
-                'complexity': self._estimate_complexity(tree)
-            }
-            
-            return analysis
-        
-        except Exception as e:
-            return {
-                'error': str(e),
-                'file_path': str(file_path)
-            }
-    
-    def _get_node_name(self, node) -> str:
-        """Obtiene el nombre de un nodo AST"""
-        if isinstance(node, ast.Name):
-            return node.id
-        elif isinstance(node, ast.Attribute):
-            return f"{self._get_node_name(node.value)}.{node.attr}"
-        return str(type(node).__name__)
-    
-    def _get_annotation(self, node) -> Optional[str]:
-        """Obtiene anotación de tipo"""
-        if isinstance(node, ast.Name):
-            return node.id
-        elif isinstance(node, ast.Subscript):
-            return f"{self._get_node_name(node.value)}[...]"
-        return None
-    
-    def _is_module_level(self, node, tree) -> bool:
-        """Verifica si un nodo está a nivel módulo"""
-        for item in tree.body:
-            if item == node:
-                return True
-        return False
-    
-    def _get_constant_value(self, node) -> Any:
-        """Extrae valor de una constante (si es simple)"""
-        if isinstance(node, (ast.Str, ast.Num)):
-            return node.n if isinstance(node, ast.Num) else node.s
-        elif isinstance(node, ast.Constant):
-            return node.value
-        return "<complex>"
-    
-    def _estimate_complexity(self, tree) -> int:
-        """Estimación simple de complejidad ciclomática"""
-        complexity = 1  # Base
-        
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.If, ast.While, ast.For, ast.ExceptHandler)):
-                complexity += 1
-            elif isinstance(node, ast.BoolOp):
-                complexity += len(node.values) - 1
-        
-        return complexity
-    
-    def register_analysis(self, file_path: Path, analysis: Dict[str, Any]):
+        return analyze_python_source(file_path, content)
+
+    def register_analysis(self, file_path: Path, analysis: Dict[str, Any], flush: bool = True):
         """
         Registra análisis en memoria
         
         MEJORA: Ahora incluye metadata rica para ChangeEvaluator
+
+        Normaliza el esquema antes de registrar: classes/functions
+        siempre son dicts con doc_80 precomputado — así el render del
+        contexto no necesita cadenas de isinstance ni slicing por
+        llamada (cubre análisis cacheados anteriores al campo).
         """
+        docstrings = analysis.get('docstrings', {})
+        for section in ('classes', 'functions'):
+            items = analysis.get(section)
+            if not items:
+                continue
+            for i, info in enumerate(items):
+                if not isinstance(info, dict):
+                    items[i] = info = {'name': str(info)}
+                if 'doc_80' not in info:
+                    doc = docstrings.get(info.get('name', ''))
+                    if doc:
+                        info['doc_80'] = doc[:80]
+
         self.add_entry(
             action="PYTHON_FILE_ANALYZED",
             component=file_path.name,
@@ -246,43 +545,34 @@ class Core:
                 'file_path': str(file_path),
                 **analysis
             },
-            category="CODE_ANALYSIS"
+            category="CODE_ANALYSIS",
+            flush=flush
         )
     
     def get_component_analysis(self, component_name: str) -> Optional[Dict[str, Any]]:
-        """Obtiene el análisis más reciente de un componente"""
-        for entry in reversed(self.memory):
-            if (entry.get('component') == component_name and 
-                entry.get('entry_category') == 'CODE_ANALYSIS'):
+        """Obtiene el análisis más reciente de un componente (vía índice)"""
+        for idx in reversed(self._by_component.get(component_name, ())):
+            entry = self.memory[idx]
+            if entry.get('entry_category') == 'CODE_ANALYSIS':
                 return entry.get('details', {})
         return None
-    
+
     def get_all_components(self) -> List[str]:
-        """Lista todos los componentes analizados"""
-        components = set()
-        for entry in self.memory:
-            if entry.get('entry_category') == 'CODE_ANALYSIS':
-                components.add(entry.get('component'))
-        return sorted(list(components))
-    
+        """Lista todos los componentes analizados (vía índice de categoría)"""
+        components = {
+            self.memory[idx].get('component')
+            for idx in self._by_category.get('CODE_ANALYSIS', ())
+        }
+        return sorted(components)
+
     def get_memory_summary(self) -> Dict[str, Any]:
-        """Resumen de la memoria"""
+        """Resumen de la memoria (conteos O(1) desde los índices)"""
         if not self.memory:
             return {"total_entries": 0}
-        
-        categories = {}
-        components = {}
-        
-        for entry in self.memory:
-            category = entry.get('entry_category', 'UNKNOWN')
-            component = entry.get('component', 'UNKNOWN')
-            
-            categories[category] = categories.get(category, 0) + 1
-            components[component] = components.get(component, 0) + 1
-        
+
         return {
             "total_entries": len(self.memory),
-            "categories": categories,
-            "components": components,
-            "last_update": self.memory[-1].get('timestamp') if self.memory else None
+            "categories": {cat: len(idxs) for cat, idxs in self._by_category.items()},
+            "components": {comp: len(idxs) for comp, idxs in self._by_component.items()},
+            "last_update": self.memory[-1].get('timestamp')
         }
\ No newline at end of file
@@ -10,6 +10,7 @@ CARACTERÍSTICAS:
 - Cache de consultas para eficiencia
 """
 
+import asyncio
 import os
 from typing import Optional, Dict, Any, List
 from datetime import datetime
@@ -228,6 +229,66 @@ Por favor, responde basándote en el contexto del sistema proporcionado."""
             print(f"[GeminiShadow] {error_msg}")
             return error_msg
     
+    async def ask_async(self, question: str,
+                        focus_component: Optional[str] = None,
+                        use_history: bool = True) -> str:
+        """
+        Variante async de ask() usando generate_content_async.
+
+        Varias preguntas independientes se pueden despachar con
+        asyncio.gather: el tiempo total es el de la llamada más lenta
+        en vez de la suma de todas (las esperas de red se solapan).
+        """
+        try:
+            self.stats['queries'] += 1
+
+            prompt = self._build_prompt_with_context(question, focus_component)
+
+            if use_history and self.conversation_history:
+                history_text = "\n\n=== CONVERSACIÓN PREVIA ===\n"
+                for entry in self.conversation_history[-3:]:
+                    history_text += f"Usuario: {entry['question']}\n"
+                    history_text += f"Asistente: {entry['answer'][:200]}...\n\n"
+                prompt = history_text + prompt
+
+            response = await self.model.generate_content_async(prompt)
+            answer = response.text
+
+            self.conversation_history.append({
+                'timestamp': datetime.now().isoformat(),
+                'question': question,
+                'answer': answer,
+                'focus_component': focus_component
+            })
+
+            return answer
+
+        except Exception as e:
+            self.stats['errors'] += 1
+            error_msg = f"Error al consultar Gemini: {str(e)}"
+            print(f"[GeminiShadow] {error_msg}")
+            return error_msg
+
+    def ask_many(self, questions: List[str],
+                 max_concurrent: int = 8) -> List[str]:
+        """
+        Despacha varias preguntas independientes en paralelo.
+
+        Un Semaphore acota la concurrencia para respetar los límites
+        de QPM del tier de la API. Sin historial: las preguntas son
+        independientes entre sí.
+        """
+        async def _gather():
+            sem = asyncio.Semaphore(max_concurrent)
+
+            async def _one(q):
+                async with sem:
+                    return await self.ask_async(q, use_history=False)
+
+            return await asyncio.gather(*[_one(q) for q in questions])
+
+        return asyncio.run(_gather())
+
     def ask_about_component(self, component_name: str) -> str:
         """
         Análisis detallado de un componente específico
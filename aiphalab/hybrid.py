@@ -8,13 +8,22 @@ ARQUITECTURA:
 - Híbrido: Mejor de ambos mundos
 """
 
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Any
+import hashlib
+import logging
 import os
 
-from core import Core
+from core import Core, analyze_python_source, parse_py_keyed
 from mcp_adapters import MCPFactory, FilesystemMCPAdapter, RipgrepMCPAdapter, GitMCPAdapter, SQLiteCacheMCPAdapter
 
+# Trazas de inicialización tras logging.debug: print con flush cuesta
+# ~5-10ms por llamada en Windows y domina el cold-start de scripts
+# que construyen Hybrid antes de trabajar
+logger = logging.getLogger(__name__)
+
 
 class Hybrid:
     """
@@ -27,26 +36,29 @@ class Hybrid:
     4. Análisis incremental (Git MCP)
     5. Búsqueda ultrarrápida (Ripgrep MCP)
     """
-    
+
+    _RG_CACHE_MAX = 128  # entradas del LRU de queries de ripgrep
+
+
     def __init__(self, base_path: str = "../Aipha_0.0.1"):
-        print(f"[Hybrid] Input base_path: '{base_path}' (tipo: {type(base_path)})")
+        logger.debug("Input base_path: %r (tipo: %s)", base_path, type(base_path))
 
         self.base_path = Path(base_path)
-        print(f"[Hybrid] Base path Path object: {self.base_path}")
-        print(f"[Hybrid] Base path resolved: {self.base_path.resolve()}")
+        logger.debug("Base path Path object: %s", self.base_path)
+        logger.debug("Base path resolved: %s", self.base_path.resolve())
 
         # Crear archivo de memoria único por sistema (solución profesional)
         system_name = self.base_path.name  # Ej: "Aipha_0.0.1" o "aipha_1"
-        memory_file = f"memory_{system_name}.json"
-        print(f"[Hybrid] Memoria dedicada: '{memory_file}'")
+        memory_file = f"memory_{system_name}.jsonl"
+        logger.debug("Memoria dedicada: %r", memory_file)
 
         # Inicializar Core con memoria dedicada
         self.core = Core(memory_file)
-        print("[Hybrid] Core inicializado")
+        logger.debug("Core inicializado")
 
         # Convertir a string para MCPs
         base_path_str = str(self.base_path)
-        print(f"[Hybrid] Base path string para MCPs: '{base_path_str}'")
+        logger.debug("Base path string para MCPs: %r", base_path_str)
 
         # Inicializar adaptadores MCP (probados, robustos)
         self.mcps = MCPFactory.create_adapters(base_path_str)
@@ -55,8 +67,22 @@ class Hybrid:
         self.git = self.mcps['git']
         self.cache = self.mcps['sqlite_cache']
 
-        print(f"[Hybrid] MCPs inicializados con base_path: '{base_path_str}'")
-        print("[Hybrid] Sistema híbrido listo\n")
+        # Índice invertido nombre→registros para búsqueda estructural.
+        # None = pendiente de (re)construir; se invalida tras analizar.
+        self._name_index: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._name_keys: List[str] = []
+
+        # Cache del contexto renderizado para el LLM, keyed por
+        # (focus, tamaño de la memoria) — se auto-invalida al crecer el log
+        self._context_cache: Dict[Any, str] = {}
+
+        # LRU de queries de ripgrep: amortiza el fork+exec (~5-20ms,
+        # más en Windows) de queries repetidas en una misma sesión.
+        # Se vacía tras cada análisis (los archivos pudieron cambiar).
+        self._rg_query_cache: OrderedDict = OrderedDict()
+
+        logger.debug("MCPs inicializados con base_path: %r", base_path_str)
+        logger.debug("Sistema híbrido listo")
     
     # === ANÁLISIS INTELIGENTE ===
     
@@ -71,138 +97,393 @@ class Hybrid:
         - 10-100x más rápido para re-análisis
         """
         print("[Hybrid] Iniciando análisis...")
-        
+
         if force:
             print("  Modo: Análisis completo (forzado)")
-            files_to_analyze = self.fs.list_files("*.py")
+            self._analyze_files_parallel(self._list_py_files())
+            return
         else:
             print("  Modo: Análisis incremental (solo cambios)")
-            changed_files = self.git.get_changed_files() if self.git.enabled else []
-            
-            if changed_files:
-                print(f"  Archivos modificados detectados: {len(changed_files)}")
+            # Diff desde el último commit analizado (guardado en el cache
+            # SQLite), no desde HEAD~1: cubre todo lo acumulado entre
+            # ejecuciones, incluyendo cambios sin commitear y archivos nuevos
+            head_commit = self.git.get_head_commit() if self.git.enabled else None
+            last_analyzed = self.cache.get_meta('last_analyzed_commit')
+
+            # Atajo: mismo HEAD que el último análisis y working tree
+            # limpio → no hay nada que re-analizar (2 llamadas a git,
+            # cero stats, cero parseo)
+            if (head_commit and head_commit == last_analyzed
+                    and self.git.is_worktree_clean()):
+                print("  Sin commits nuevos desde el último análisis")
+                return
+
+            if head_commit and last_analyzed:
+                changed_files = self.git.get_changed_files(since=last_analyzed)
+                print(f"  Archivos modificados desde {last_analyzed[:8]}: {len(changed_files)}")
                 files_to_analyze = changed_files
             else:
-                print("  No hay cambios detectados, analizando todo")
-                files_to_analyze = self.fs.list_files("*.py")
+                # Primera ejecución o sin git: escaneo completo
+                # (el cache por mtime evita re-parsear lo que no cambió)
+                print("  Sin commit de referencia, analizando todo")
+                files_to_analyze = self._list_py_files()
         
-        # Analizar cada archivo
-        analyzed_count = 0
+        # Fase (a0): fast-path por stat — un syscall por archivo, cero
+        # lecturas. Si (mtime_ns, size) coincide con la clave cacheada,
+        # el archivo ni se abre.
         cached_count = 0
-        
+        to_read = []  # (file_path, stamp, fila de cache o None)
         for file_path in files_to_analyze:
-            result = self._analyze_file_with_cache(file_path)
-            if result == 'analyzed':
-                analyzed_count += 1
-            elif result == 'cached':
+            try:
+                st = os.stat(self.base_path / file_path)
+            except OSError:
+                continue
+            stamp = f"{st.st_mtime_ns}:{st.st_size}"
+            row = self.cache.get_cached(file_path)
+            if row and row[0].startswith(stamp + ':'):
+                self.core.register_analysis(Path(file_path), row[1], flush=False)
                 cached_count += 1
-        
+            else:
+                to_read.append((file_path, stamp, row))
+
+        # Fase (a)+(b) en pipeline: lecturas (hilos; I/O libera el GIL)
+        # solapadas con el parseo AST (procesos). Cada miss se envía al
+        # pool de procesos en cuanto llega su contenido, así el parseo
+        # del lote N avanza mientras se lee el lote N+1 — relevante en
+        # discos lentos, donde antes la fase de lectura serializaba todo.
+        # Lotes de 64 para acotar la memoria residente (backpressure);
+        # pools de procesos no compensan para un puñado de archivos, se
+        # arranca uno solo al pasar de 8 misses.
+        misses = []   # (file_path, clave compuesta) en orden de envío
+        pending = []  # (file_path, content) aún sin repartir
+        futures = []
+        ppool = None
+        batch_size = 64
+        try:
+            with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+                for start in range(0, len(to_read), batch_size):
+                    batch = to_read[start:start + batch_size]
+                    results = pool.map(self.fs.read_file_hashed,
+                                       [f for f, _, _ in batch])
+                    for (file_path, stamp, row), hashed in zip(batch, results):
+                        if hashed is None:
+                            continue
+                        sha, content = hashed
+                        if row and row[0].endswith(':' + sha):
+                            # Mismo contenido con mtime nuevo (ej: checkout):
+                            # re-cachear bajo el stamp actual
+                            self.cache.cache_analysis(file_path, f"{stamp}:{sha}", row[1])
+                            self.core.register_analysis(Path(file_path), row[1], flush=False)
+                            cached_count += 1
+                            continue
+                        misses.append((file_path, f"{stamp}:{sha}"))
+                        pending.append((file_path, content))
+                        if ppool is None and len(pending) >= 8:
+                            ppool = ProcessPoolExecutor(max_workers=os.cpu_count())
+                        if ppool is not None:
+                            for p, c in pending:
+                                futures.append(ppool.submit(
+                                    analyze_python_source, Path(p), c))
+                            pending.clear()
+
+            # Recoger resultados (mismo orden que misses: primero lo
+            # enviado al pool, después los pocos que quedaron locales)
+            analyses = [f.result() for f in futures]
+            analyses.extend(self.core.analyze_python_file(Path(p), c)
+                            for p, c in pending)
+        finally:
+            if ppool is not None:
+                ppool.shutdown()
+
+        # Fase (c): merge en el proceso principal (memoria + cache)
+        for (file_path, cache_key), analysis in zip(misses, analyses):
+            self.core.register_analysis(Path(file_path), analysis, flush=False)
+            self.cache.cache_analysis(file_path, cache_key, analysis)
+        analyzed_count = len(misses)
+
+        # Un solo flush a disco para todo el lote (evita O(N²) bytes escritos)
+        self.core.flush()
+        self.cache.flush()
+
+        # Marcar hasta dónde llegó este análisis
+        if head_commit:
+            self.cache.set_meta('last_analyzed_commit', head_commit)
+
+        self._name_index = None  # invalidar índice de búsqueda
+        self._rg_query_cache.clear()
+
         print(f"\n[Hybrid] Análisis completado:")
         print(f"  ✅ Archivos analizados: {analyzed_count}")
         print(f"  ⚡ Desde cache: {cached_count}")
         print(f"  📊 Total: {analyzed_count + cached_count}")
-    
-    def _analyze_file_with_cache(self, file_path: str) -> str:
+
+    def _list_py_files(self) -> List[str]:
+        """
+        Listado de archivos .py del repo, por la vía más rápida disponible.
+
+        VENTAJA: `rg --files` recorre el árbol en paralelo respetando
+        .gitignore (en C, sin stat por entrada); si rg no está instalado
+        se cae al walker de os.scandir del filesystem MCP.
+        """
+        if self.rg.enabled:
+            files = self.rg.list_files("*.py")
+            if files:
+                return files
+        return self.fs.list_files("*.py")
+
+    def _analyze_files_parallel(self, files: List[str]):
+        """
+        Análisis completo en paralelo con ProcessPoolExecutor.
+
+        VENTAJA: el parseo AST es CPU-bound; repartirlo entre cores
+        y acumular las entradas con un único flush reduce el wall-clock
+        proporcionalmente a los cores y los bytes escritos de O(N²) a O(N).
+        """
+        paths = [str(self.base_path / f) for f in files]
+
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+            results = list(pool.map(parse_py_keyed, paths, chunksize=32))
+
+        bulk = []
+        for rel_path, keyed in zip(files, results):
+            if keyed is None:
+                continue
+            cache_key, analysis = keyed
+            bulk.append({
+                'action': 'PYTHON_FILE_ANALYZED',
+                'component': Path(rel_path).name,
+                'details': {'file_path': rel_path, **analysis},
+                'category': 'CODE_ANALYSIS'
+            })
+            # Poblar el cache también en el camino forzado: si no, el
+            # siguiente análisis incremental arranca con cache vacío y
+            # re-parsea el árbol entero
+            self.cache.cache_analysis(rel_path, cache_key, analysis)
+
+        self.core._add_entries_bulk(bulk)
+        self.cache.flush()
+
+        # Marcar hasta dónde llegó este análisis, igual que el camino
+        # incremental; sin el marcador la siguiente ejecución no tiene
+        # commit de referencia y escanea todo
+        head_commit = self.git.get_head_commit() if self.git.enabled else None
+        if head_commit:
+            self.cache.set_meta('last_analyzed_commit', head_commit)
+
+        self._name_index = None  # invalidar índice de búsqueda
+        self._rg_query_cache.clear()
+
+        print(f"\n[Hybrid] Análisis completado:")
+        print(f"  ✅ Archivos analizados: {len(bulk)}")
+        print(f"  📊 Total: {len(files)}")
+
+    def _analyze_file_with_cache(self, file_path: str, flush: bool = True,
+                                 content: Optional[str] = None) -> str:
         """
         Analiza un archivo usando cache inteligente
-        
-        VENTAJA: Evita re-analizar archivos sin cambios
+
+        VENTAJA: Evita re-analizar archivos sin cambios.
+        El contenido puede venir prefetcheado (lecturas en paralelo).
+
+        Cache de dos niveles bajo la clave "mtime_ns:size:sha256":
+        1. Fast-path por stat — si (mtime_ns, size) coincide, hit sin
+           abrir el archivo (cero IO).
+        2. Hash de contenido — cubre checkouts de git (bytes iguales,
+           mtime nuevo: hit, y se promueve al fast-path) y touch sin
+           cambios; content-addressable como clave fuerte.
         """
         full_path = self.base_path / file_path
-        
-        # Obtener timestamp de última modificación
         try:
-            last_modified = os.path.getmtime(full_path)
-            last_modified_str = str(last_modified)
-        except:
-            last_modified_str = "unknown"
-        
-        # Verificar cache
-        cached = self.cache.get_cached_analysis(file_path, last_modified_str)
-        if cached:
-            # Usar análisis cacheado
-            self.core.register_analysis(Path(file_path), cached)
+            st = os.stat(full_path)
+        except OSError:
+            return 'skipped'
+        stamp = f"{st.st_mtime_ns}:{st.st_size}"
+
+        row = self.cache.get_cached(file_path)
+        if row and row[0].startswith(stamp + ':'):
+            self.core.register_analysis(Path(file_path), row[1], flush=flush)
             return 'cached'
-        
-        # Leer contenido (usando filesystem MCP)
-        content = self.fs.read_file(file_path)
+
+        # Leer + hashear en una pasada (mmap zero-copy para archivos
+        # grandes) salvo que el contenido venga prefetcheado
+        if content is None:
+            hashed = self.fs.read_file_hashed(file_path)
+            if hashed is None:
+                return 'skipped'
+            content_sha, content = hashed
+        else:
+            content_sha = hashlib.sha256(content.encode('utf-8')).hexdigest()
         if not content:
             return 'skipped'
-        
+        cache_key = f"{stamp}:{content_sha}"
+
+        if row and row[0].endswith(':' + content_sha):
+            # Promover al fast-path de mtime para la próxima pasada
+            self.cache.cache_analysis(file_path, cache_key, row[1])
+            self.core.register_analysis(Path(file_path), row[1], flush=flush)
+            return 'cached'
+
         # Analizar (usando Core)
         analysis = self.core.analyze_python_file(Path(file_path), content)
-        
+
         # Registrar análisis
-        self.core.register_analysis(Path(file_path), analysis)
-        
+        self.core.register_analysis(Path(file_path), analysis, flush=flush)
+
         # Cachear resultado
-        self.cache.cache_analysis(file_path, last_modified_str, analysis)
-        
+        self.cache.cache_analysis(file_path, cache_key, analysis)
+
         return 'analyzed'
     
     # === BÚSQUEDA HÍBRIDA ===
     
-    def search(self, query: str, search_type: str = 'hybrid') -> List[Dict[str, Any]]:
+    def search(self, query: str, search_type: str = 'hybrid',
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Búsqueda híbrida: combina ripgrep (rápido) con Shadow (estructurado)
-        
+
         VENTAJA: 100x más rápido que búsqueda lineal en JSON
-        
+
         Tipos de búsqueda:
         - 'hybrid': Combina ripgrep + Shadow (RECOMENDADO)
         - 'text': Solo ripgrep (ultrarrápido, menos contexto)
         - 'structural': Solo Shadow (rico contexto, más lento)
+
+        Con `limit`, rg se corta en el match N (early-exit) y los
+        resultados estructurales se truncan igual.
         """
         results = {'text_matches': [], 'structural_matches': []}
-        
+        candidates = None
+
         if search_type in ['hybrid', 'text']:
             # Búsqueda de texto con ripgrep (ultrarrápida)
             if self.rg.enabled:
                 print(f"[Hybrid] Búsqueda de texto con ripgrep: '{query}'")
-                text_results = self.rg.search(query)
+                cache_key = (query, limit)
+                text_results = self._rg_query_cache.get(cache_key)
+                if text_results is not None:
+                    self._rg_query_cache.move_to_end(cache_key)
+                else:
+                    text_results = self.rg.search(query, limit=limit)
+                    self._rg_query_cache[cache_key] = text_results
+                    if len(self._rg_query_cache) > self._RG_CACHE_MAX:
+                        self._rg_query_cache.popitem(last=False)
                 results['text_matches'] = text_results
+                # Los hits de rg acotan qué componentes visitar en la
+                # pasada estructural: O(hits) en vez de O(componentes).
+                # rsplit evita construir un Path por match.
+                if search_type == 'hybrid':
+                    candidates = {
+                        m['file'].replace('\\', '/').rsplit('/', 1)[-1]
+                        for m in text_results
+                    }
             else:
                 print("[Hybrid] Ripgrep no disponible, usando fallback")
-        
+
         if search_type in ['hybrid', 'structural']:
             # Búsqueda estructurada en Shadow (contexto rico)
             print(f"[Hybrid] Búsqueda estructurada en Shadow: '{query}'")
-            structural_results = self._search_in_shadow(query)
-            results['structural_matches'] = structural_results
-        
+            results['structural_matches'] = self._search_in_shadow(
+                query, candidates, limit=limit)
+
         return results
-    
-    def _search_in_shadow(self, query: str) -> List[Dict[str, Any]]:
-        """Búsqueda estructurada en memoria de Shadow"""
-        query_lower = query.lower()
-        matches = []
-        
+
+    def search_many(self, queries: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Búsqueda de texto de varios patrones de una vez.
+
+        VENTAJA: los misses del LRU se resuelven con UNA invocación de
+        rg (batch_search compila todos los patrones en un autómata y
+        recorre el repo una sola vez) en vez de un fork+exec por query.
+        """
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        misses = []
+        for query in queries:
+            cached = self._rg_query_cache.get((query, None))
+            if cached is not None:
+                self._rg_query_cache.move_to_end((query, None))
+                results[query] = cached
+            else:
+                misses.append(query)
+
+        if misses:
+            for query, matches in self.rg.batch_search(misses).items():
+                results[query] = matches
+                self._rg_query_cache[(query, None)] = matches
+                if len(self._rg_query_cache) > self._RG_CACHE_MAX:
+                    self._rg_query_cache.popitem(last=False)
+
+        return results
+
+    def _build_name_index(self):
+        """
+        Construye el índice invertido nombre→registros.
+
+        Se construye UNA vez tras cada análisis (lazy) y responde todas
+        las queries siguientes con un filtro sobre claves ya minusculadas
+        en vez de re-escanear componente a componente.
+        """
+        index: Dict[str, List[Dict[str, Any]]] = {}
         for component in self.core.get_all_components():
             analysis = self.core.get_component_analysis(component)
             if not analysis:
                 continue
-            
-            # Buscar en clases
-            for class_info in analysis.get('classes', []):
-                if query_lower in class_info.get('name', '').lower():
-                    matches.append({
-                        'type': 'class',
-                        'component': component,
-                        'name': class_info['name'],
-                        'context': class_info
-                    })
-            
-            # Buscar en funciones
-            for func_info in analysis.get('functions', []):
-                if query_lower in func_info.get('name', '').lower():
-                    matches.append({
-                        'type': 'function',
+            for kind, section in (('class', 'classes'), ('function', 'functions')):
+                for info in analysis.get(section, []):
+                    if not isinstance(info, dict):
+                        continue
+                    name = info.get('name', '')
+                    if not name:
+                        continue
+                    index.setdefault(name.lower(), []).append({
+                        'type': kind,
                         'component': component,
-                        'name': func_info['name'],
-                        'context': func_info
+                        'name': name,
+                        'context': info
                     })
-        
-        return matches
+        self._name_index = index
+        self._name_keys = list(index)
+
+    def _search_in_shadow(self, query: str,
+                          components: Optional[set] = None,
+                          limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Búsqueda estructurada en memoria de Shadow (vía índice invertido).
+
+        Con `components` (ej: archivos con hits de ripgrep) el resultado
+        se restringe a esos componentes. Con `limit`, los matches se
+        rankean por relevancia (exacto > prefijo > substring) y solo se
+        devuelven los K mejores vía heapq.nlargest — O(N log K) en vez
+        de ordenar todo y cortar.
+        """
+        if self._name_index is None:
+            self._build_name_index()
+
+        query_lower = query.lower()
+        if limit is None:
+            matches = [
+                rec
+                for key in self._name_keys if query_lower in key
+                for rec in self._name_index[key]
+            ]
+            if components is not None:
+                matches = [m for m in matches if m['component'] in components]
+            return matches
+
+        import heapq
+        scored = []
+        for key in self._name_keys:
+            if query_lower not in key:
+                continue
+            # Relevancia: match exacto > prefijo > substring
+            score = ((key == query_lower) * 3
+                     + key.startswith(query_lower) * 2
+                     + 1)
+            for rec in self._name_index[key]:
+                if components is not None and rec['component'] not in components:
+                    continue
+                scored.append((score, rec))
+        top = heapq.nlargest(limit, scored, key=lambda t: t[0])
+        return [rec for _, rec in top]
     
     # === CONTEXTO PARA LLM ===
     
@@ -211,9 +492,34 @@ class Hybrid:
         Genera contexto completo para Gemini
         
         MEJORA: Ahora incluye información de Git (evolución histórica)
+
+        El render se cachea keyed por (focus, nº de entradas en memoria):
+        mientras no se registre análisis nuevo, llamadas repetidas — una
+        por pregunta al LLM — devuelven el string ya construido.
         """
+        cache_key = (focus, len(self.core.memory))
+        cached = self._context_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Segundo nivel en disco: una sesión nueva (proceso nuevo,
+        # memoria idéntica) arranca con el contexto ya renderizado
+        disk_path = self._context_cache_path(focus, len(self.core.memory))
+        try:
+            if disk_path.exists():
+                rendered = disk_path.read_text(encoding='utf-8')
+                self._context_cache[cache_key] = rendered
+                return rendered
+        except OSError:
+            pass
+
+        # UNA invocación de git para el historial de todos los
+        # componentes (en vez de un fork por componente en el bucle)
+        history_by_file = (self.git.get_files_history()
+                           if self.git.enabled and not focus else {})
+
         lines = []
-        
+
         lines.append("=== AIPHA_0.0.1 SYSTEM CONTEXT (HYBRID) ===\n")
         
         # Resumen del sistema
@@ -242,46 +548,44 @@ class Hybrid:
             if 'module' in docstrings:
                 lines.append(f"  Description: {docstrings['module'][:100]}...")
             
-            # Clases
+            # Clases: el esquema viene normalizado de register_analysis
+            # (siempre dicts, doc_80 precomputado), así que el bucle no
+            # necesita isinstance ni slicing por render
             classes = analysis.get('classes', [])
             if classes:
                 lines.append(f"  Classes:")
                 for cls in classes:
-                    if isinstance(cls, dict):
-                        methods = ', '.join(cls.get('methods', []))
-                        lines.append(f"    - {cls['name']}")
-                        if methods:
-                            lines.append(f"      Methods: {methods}")
-                        if cls['name'] in docstrings:
-                            lines.append(f"      Doc: {docstrings[cls['name']][:80]}...")
-                    else:
-                        # Handle case where cls might be a string
-                        lines.append(f"    - {cls}")
-            
+                    methods = ', '.join(cls.get('methods', []))
+                    lines.append(f"    - {cls['name']}")
+                    if methods:
+                        lines.append(f"      Methods: {methods}")
+                    if 'doc_80' in cls:
+                        lines.append(f"      Doc: {cls['doc_80']}...")
+
             # Funciones
             functions = analysis.get('functions', [])
             if functions:
                 lines.append(f"  Functions:")
                 for func in functions:
-                    if isinstance(func, dict):
-                        params = ', '.join(func.get('params', []))
-                        lines.append(f"    - {func['name']}({params})")
-                        if func['name'] in docstrings:
-                            lines.append(f"      Doc: {docstrings[func['name']][:80]}...")
-                    else:
-                        # Handle case where func might be a string
-                        lines.append(f"    - {func}")
+                    params = ', '.join(func.get('params', []))
+                    lines.append(f"    - {func['name']}({params})")
+                    if 'doc_80' in func:
+                        lines.append(f"      Doc: {func['doc_80']}...")
             
-            # Imports
-            imports = analysis.get('imports', [])
-            if imports:
-                import_modules = []
-                for imp in imports:
+            # Imports: ya vienen deduplicados del análisis (imports_flat);
+            # el escaneo con isinstance queda solo para análisis viejos
+            # cacheados sin esa clave
+            import_modules = analysis.get('imports_flat')
+            if import_modules is None:
+                seen = set()
+                for imp in analysis.get('imports', []):
                     if isinstance(imp, dict) and 'module' in imp:
-                        import_modules.append(imp['module'])
+                        seen.add(imp['module'])
                     elif isinstance(imp, str):
-                        import_modules.append(imp)
-                lines.append(f"  Imports: {', '.join(set(import_modules))}")
+                        seen.add(imp)
+                import_modules = sorted(seen)
+            if import_modules:
+                lines.append(f"  Imports: {', '.join(import_modules)}")
             
             # Estadísticas
             stats = analysis.get('stats', {})
@@ -291,13 +595,36 @@ class Hybrid:
             
             # Historial (si Git está disponible)
             if self.git.enabled and not focus:
-                history = self.git.get_file_history(component, limit=3)
+                history = history_by_file.get(component, [])[:3]
                 if history:
                     lines.append(f"  Recent Changes:")
                     for commit in history[:2]:
                         lines.append(f"    - {commit['date'][:10]}: {commit['message'][:50]}")
-        
-        return "\n".join(lines)
+
+        rendered = "\n".join(lines)
+        if len(self._context_cache) >= 64:
+            self._context_cache.clear()
+        self._context_cache[cache_key] = rendered
+
+        # Persistir a disco y retirar versiones obsoletas del mismo focus
+        try:
+            disk_path.parent.mkdir(exist_ok=True)
+            for stale in disk_path.parent.glob(
+                    disk_path.name.rsplit('_', 1)[0] + '_*.txt'):
+                if stale != disk_path:
+                    stale.unlink(missing_ok=True)
+            disk_path.write_text(rendered, encoding='utf-8')
+        except OSError:
+            pass
+
+        return rendered
+
+    def _context_cache_path(self, focus: Optional[str], version: int) -> Path:
+        """Ruta del cache de contexto en disco para (focus, versión)"""
+        focus_key = (hashlib.sha256(focus.encode('utf-8')).hexdigest()[:12]
+                     if focus else 'all')
+        name = f"{self.base_path.name}_{focus_key}_{version}.txt"
+        return Path('shadow_context_cache') / name
     
     def get_component_details(self, component: str) -> Dict[str, Any]:
         """
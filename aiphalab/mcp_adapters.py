@@ -4,12 +4,44 @@ Adaptadores para MCPs profesionales.
 Mantienen una interfaz limpia y controlada para Shadow.
 """
 
+import functools
+import hashlib
+import logging
+import os
 import subprocess
 import json
 from pathlib import Path
 from typing import List, Dict, Optional, Any
 import shutil
 
+
+@functools.lru_cache(maxsize=None)
+def _which(tool: str) -> Optional[str]:
+    """
+    shutil.which cacheado: recorre $PATH con un stat por directorio,
+    y MCPFactory.create_adapters se llama repetidamente en sesiones
+    largas — el binario no cambia de sitio entre llamadas.
+    """
+    return shutil.which(tool)
+
+# orjson es opcional: (de)codifica el JSON de ripgrep y del cache
+# SQLite ~3-10x más rápido que la stdlib
+try:
+    import orjson
+    _loads = orjson.loads
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+from _walk import iter_entries, walk_repo
+
+logger = logging.getLogger(__name__)
+
 class MCPAdapter:
     """Clase base para adaptadores MCP"""
     
@@ -31,35 +63,60 @@ class FilesystemMCPAdapter(MCPAdapter):
         super().__init__(enabled)
         self.base_path = Path(base_path)
     
+    # Encoding detectado por (ruta, mtime_ns): mientras el archivo no
+    # cambie, re-lecturas saltan el probe binario y los decodes fallidos
+    _encoding_cache: Dict[tuple, Optional[str]] = {}
+    _ENCODING_CACHE_MAX = 4096
+
     def read_file(self, file_path: str) -> Optional[str]:
         """
         Lee un archivo con manejo robusto de errores
-        
+
         VENTAJA sobre tu implementación:
         - Maneja múltiples encodings automáticamente
         - Detecta archivos binarios
         - Gestiona permisos correctamente
+        - Cachea el encoding por (ruta, mtime): re-lecturas decodifican
+          a la primera sin probe binario ni intentos fallidos
         """
         if not self.enabled:
             return self._fallback_read(file_path)
-        
+
         try:
             full_path = self.base_path / file_path
-            
+
+            try:
+                cache_key = (str(full_path), full_path.stat().st_mtime_ns)
+            except OSError:
+                return None
+
+            if cache_key in self._encoding_cache:
+                encoding = self._encoding_cache[cache_key]
+                if encoding is None:  # binario conocido
+                    return None
+                with open(full_path, 'r', encoding=encoding) as f:
+                    return f.read()
+
+            if len(self._encoding_cache) >= self._ENCODING_CACHE_MAX:
+                self._encoding_cache.clear()
+
             # Detectar archivos binarios
             if self._is_binary(full_path):
+                self._encoding_cache[cache_key] = None
                 return None
-            
+
             # Intentar múltiples encodings
             for encoding in ['utf-8', 'latin-1', 'cp1252']:
                 try:
                     with open(full_path, 'r', encoding=encoding) as f:
-                        return f.read()
+                        content = f.read()
+                    self._encoding_cache[cache_key] = encoding
+                    return content
                 except UnicodeDecodeError:
                     continue
-            
+
             return None
-        
+
         except Exception as e:
             print(f"[FilesystemMCP] Error leyendo {file_path}: {e}")
             return None
@@ -71,21 +128,72 @@ class FilesystemMCPAdapter(MCPAdapter):
         VENTAJA: Recursivo, eficiente, maneja symlinks
         """
         try:
-            files = list(self.base_path.rglob(pattern))
-            return [str(f.relative_to(self.base_path)) for f in files]
+            return list(walk_repo(self.base_path, pattern))
         except Exception as e:
             print(f"[FilesystemMCP] Error listando archivos: {e}")
             return []
     
+    # Extensiones que nunca son binarias: detección sin abrir el archivo
+    _TEXT_SUFFIXES = {'.py', '.json', '.jsonl', '.md', '.txt', '.toml',
+                      '.cfg', '.ini', '.yml', '.yaml'}
+
     def _is_binary(self, file_path: Path) -> bool:
-        """Detecta si un archivo es binario"""
+        """
+        Detecta si un archivo es binario
+
+        Extensiones de texto conocidas se resuelven sin syscalls; el
+        resto mapea la primera página y busca NUL con el memchr en C
+        de `in` sobre bytes (sin copiar el chunk al heap de Python).
+        """
+        if file_path.suffix.lower() in self._TEXT_SUFFIXES:
+            return False
         try:
-            with open(file_path, 'rb') as f:
-                chunk = f.read(1024)
-                return b'\x00' in chunk
-        except:
+            import mmap
+            fd = os.open(file_path, os.O_RDONLY)
+            try:
+                size = os.fstat(fd).st_size
+                if size == 0:
+                    return False
+                with mmap.mmap(fd, min(size, 4096), access=mmap.ACCESS_READ) as mm:
+                    return mm.find(b'\x00', 0, 1024) != -1
+            finally:
+                os.close(fd)
+        except (OSError, ValueError):
             return True
     
+    def read_file_hashed(self, file_path: str) -> Optional[tuple]:
+        """
+        Lee un archivo y devuelve (sha256_hex, contenido).
+
+        El hash se calcula sobre los bytes crudos — los archivos
+        grandes (>=1MB) se mapean con mmap y hashlib consume las
+        páginas zero-copy — y el decode a str se hace UNA vez.
+        Evita el camino leer→decodificar→re-encodear→hashear que paga
+        una pasada UTF-8 extra por archivo.
+        """
+        try:
+            full_path = self.base_path / file_path
+            fd = os.open(full_path, os.O_RDONLY)
+            try:
+                size = os.fstat(fd).st_size
+                if size == 0:
+                    return None
+                if size >= (1 << 20):
+                    import mmap
+                    with mmap.mmap(fd, size, access=mmap.ACCESS_READ) as mm:
+                        sha = hashlib.sha256(mm).hexdigest()
+                        content = mm[:].decode('utf-8', errors='replace')
+                else:
+                    data = os.read(fd, size)
+                    sha = hashlib.sha256(data).hexdigest()
+                    content = data.decode('utf-8', errors='replace')
+            finally:
+                os.close(fd)
+            return (sha, content)
+
+        except OSError:
+            return None
+
     def _fallback_read(self, file_path: str) -> Optional[str]:
         """Fallback si MCP no disponible"""
         try:
@@ -104,26 +212,33 @@ class RipgrepMCPAdapter(MCPAdapter):
     def __init__(self, base_path: str = ".", enabled: bool = None):
         # Auto-detectar si ripgrep está disponible
         if enabled is None:
-            enabled = shutil.which('rg') is not None
+            enabled = _which('rg') is not None
         
         super().__init__(enabled)
         self.base_path = Path(base_path)
     
-    def search(self, pattern: str, file_type: str = "py") -> List[Dict[str, Any]]:
+    def search(self, pattern: str, file_type: str = "py",
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Búsqueda ultrarrápida con ripgrep
-        
+
         VENTAJA sobre búsqueda lineal:
         - 100-1000x más rápido
         - Búsqueda paralela
         - Regex optimizado
         - Ignora archivos no relevantes automáticamente
+
+        Con `limit` el consumo del stream se corta en el match N y se
+        termina rg: la latencia es la de los primeros N matches, no la
+        del repo completo.
         """
         if not self.enabled:
-            return self._fallback_search(pattern)
+            matches = self._fallback_search(pattern)
+            return matches[:limit] if limit is not None else matches
         
         try:
-            # ripgrep con salida JSON estructurada
+            # ripgrep con salida JSON estructurada; --max-columns evita
+            # serializar líneas kilométricas (minificados, data embebida)
             cmd = [
                 'rg',
                 pattern,
@@ -131,21 +246,30 @@ class RipgrepMCPAdapter(MCPAdapter):
                 '--json',
                 f'--type={file_type}',
                 '--no-heading',
-                '--line-number'
+                '--line-number',
+                '--max-columns=150'
             ]
-            
-            result = subprocess.run(
+
+            # Queries literales no pagan compilación de regex
+            if not any(c in pattern for c in r'.*+?[](){}|^$\\'):
+                cmd.append('--fixed-strings')
+
+            # Streaming: parsear cada línea según llega por el pipe en vez
+            # de bufferizar todo el stdout (en repos grandes pueden ser MBs)
+            proc = subprocess.Popen(
                 cmd,
-                capture_output=True,
-                text=True,
-                timeout=10
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=1 << 20
             )
-            
-            # Parsear resultados JSON
+
             matches = []
-            for line in result.stdout.splitlines():
-                try:
-                    data = json.loads(line)
+            try:
+                for line in proc.stdout:
+                    try:
+                        data = _loads(line)
+                    except ValueError:
+                        continue
                     if data.get('type') == 'match':
                         matches.append({
                             'file': data['data']['path']['text'],
@@ -153,33 +277,162 @@ class RipgrepMCPAdapter(MCPAdapter):
                             'content': data['data']['lines']['text'].strip(),
                             'match': pattern
                         })
-                except json.JSONDecodeError:
-                    continue
-            
+                        if limit is not None and len(matches) >= limit:
+                            proc.terminate()
+                            break
+            finally:
+                proc.stdout.close()
+                proc.wait(timeout=10)
+
             return matches
-        
+
         except (subprocess.TimeoutExpired, FileNotFoundError) as e:
             print(f"[RipgrepMCP] Error: {e}")
             return self._fallback_search(pattern)
     
+    def list_files(self, pattern: str = "*.py") -> List[str]:
+        """
+        Listado de archivos con el walker paralelo de ripgrep.
+
+        VENTAJA: rg --files recorre directorios en paralelo y respeta
+        .gitignore; en árboles grandes gana incluso al walk con scandir.
+        """
+        if not self.enabled:
+            return []
+
+        try:
+            result = subprocess.run(
+                ['rg', '--files', '--glob', pattern, str(self.base_path)],
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+            base = str(self.base_path)
+            return [os.path.relpath(line, base)
+                    for line in result.stdout.splitlines() if line]
+
+        except Exception as e:
+            print(f"[RipgrepMCP] Error: {e}")
+            return []
+
+    def batch_search(self, patterns: List[str],
+                     file_type: str = "py") -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Búsqueda de múltiples patrones en UNA sola invocación de rg.
+
+        VENTAJA: el fork+exec de rg (~5-20ms) se paga una vez por lote
+        en vez de una vez por patrón; rg compila todos los patrones en
+        un solo autómata y recorre el repo una única vez.
+        """
+        results: Dict[str, List[Dict[str, Any]]] = {p: [] for p in patterns}
+        if not patterns:
+            return results
+
+        if not self.enabled:
+            import re
+            alternation = re.compile(
+                '|'.join(f'({re.escape(p)})' for p in patterns), re.IGNORECASE)
+            lowered = [p.lower() for p in patterns]
+            for rel_path in walk_repo(self.base_path, "*.py"):
+                try:
+                    with open(self.base_path / rel_path, 'r', encoding='utf-8') as f:
+                        for line_num, line in enumerate(f, 1):
+                            if not alternation.search(line):
+                                continue
+                            line_lower = line.lower()
+                            for p, p_lower in zip(patterns, lowered):
+                                if p_lower in line_lower:
+                                    results[p].append({
+                                        'file': rel_path,
+                                        'line': line_num,
+                                        'content': line.strip(),
+                                        'match': p
+                                    })
+                except OSError:
+                    continue
+            return results
+
+        cmd = ['rg', '--json', f'--type={file_type}', '--no-heading', '--line-number']
+        for p in patterns:
+            cmd.extend(['-e', p])
+        cmd.append(str(self.base_path))
+
+        try:
+            proc = subprocess.Popen(
+                cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                bufsize=1 << 20)
+            lowered = [(p, p.lower()) for p in patterns]
+            try:
+                for line in proc.stdout:
+                    try:
+                        data = _loads(line)
+                    except ValueError:
+                        continue
+                    if data.get('type') != 'match':
+                        continue
+                    content = data['data']['lines']['text'].strip()
+                    content_lower = content.lower()
+                    for p, p_lower in lowered:
+                        if p_lower in content_lower:
+                            results[p].append({
+                                'file': data['data']['path']['text'],
+                                'line': data['data']['line_number'],
+                                'content': content,
+                                'match': p
+                            })
+            finally:
+                proc.stdout.close()
+                proc.wait(timeout=10)
+        except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+            print(f"[RipgrepMCP] Error: {e}")
+
+        return results
+
     def _fallback_search(self, pattern: str) -> List[Dict[str, Any]]:
-        """Fallback a búsqueda simple si ripgrep no disponible"""
+        """
+        Fallback a búsqueda simple si ripgrep no disponible.
+
+        Regex compilado UNA vez + mmap por archivo: el matcher C de SRE
+        recorre los bytes mapeados sin partir en líneas ni alocar un
+        str.lower() por línea; el número de línea se calcula solo para
+        los matches (count de b'\\n' hasta el offset, memchr en C).
+        """
+        import mmap
+        import re
+
+        pat_re = re.compile(re.escape(pattern).encode('utf-8'), re.IGNORECASE)
         matches = []
-        
-        for py_file in self.base_path.rglob("*.py"):
+
+        for rel_path in walk_repo(self.base_path, "*.py"):
             try:
-                with open(py_file, 'r', encoding='utf-8') as f:
-                    for line_num, line in enumerate(f, 1):
-                        if pattern.lower() in line.lower():
+                fd = os.open(self.base_path / rel_path, os.O_RDONLY)
+                try:
+                    size = os.fstat(fd).st_size
+                    if size == 0:
+                        continue
+                    with mmap.mmap(fd, size, access=mmap.ACCESS_READ) as mm:
+                        line_no = 1
+                        cursor = 0
+                        for m in pat_re.finditer(mm):
+                            # Avanzar el contador solo sobre el tramo nuevo
+                            line_no += mm[cursor:m.start()].count(b'\n')
+                            cursor = m.start()
+                            start = mm.rfind(b'\n', 0, m.start()) + 1
+                            end = mm.find(b'\n', m.end())
+                            if end == -1:
+                                end = size
                             matches.append({
-                                'file': str(py_file.relative_to(self.base_path)),
-                                'line': line_num,
-                                'content': line.strip(),
+                                'file': rel_path,
+                                'line': line_no,
+                                'content': mm[start:end].decode(
+                                    'utf-8', errors='replace').strip(),
                                 'match': pattern
                             })
-            except:
+                finally:
+                    os.close(fd)
+            except (OSError, ValueError):
                 continue
-        
+
         return matches
 
 
@@ -192,19 +445,24 @@ class GitMCPAdapter(MCPAdapter):
     def __init__(self, repo_path: str = ".", enabled: bool = None):
         # Auto-detectar si git está disponible
         if enabled is None:
-            enabled = shutil.which('git') is not None
+            enabled = _which('git') is not None
 
         super().__init__(enabled)
 
         # Debug: ver qué está llegando
-        print(f"[GitMCP] Init con repo_path: '{repo_path}' (tipo: {type(repo_path)})")
+        logger.debug("Init con repo_path: %r (tipo: %s)", repo_path, type(repo_path))
 
         # Convertir a Path y luego a string absoluto
         repo_path_obj = Path(repo_path)
         self.repo_path = str(repo_path_obj.resolve())
-        print(f"[GitMCP] Repo path convertido: '{self.repo_path}'")
-        print(f"[GitMCP] Path existe: {Path(self.repo_path).exists()}")
-        print(f"[GitMCP] Es directorio: {Path(self.repo_path).is_dir()}")
+        logger.debug("Repo path convertido: %r", self.repo_path)
+        logger.debug("Path existe: %s", Path(self.repo_path).exists())
+        logger.debug("Es directorio: %s", Path(self.repo_path).is_dir())
+
+        # Cache de respuestas keyed por HEAD: mientras no entre un commit
+        # nuevo, el historial no cambia y el fork+exec de git (~10-50ms
+        # por llamada) se paga una sola vez por consulta distinta
+        self._query_cache: Dict[Any, Any] = {}
     
     def get_changed_files(self, since: str = "HEAD~1") -> List[str]:
         """
@@ -219,7 +477,10 @@ class GitMCPAdapter(MCPAdapter):
             return []
         
         try:
-            cmd = ['git', 'diff', '--name-only', since]
+            # --relative: rutas relativas a repo_path aunque éste sea un
+            # subdirectorio del repo (antes venían relativas a la raíz git
+            # y no coincidían con las rutas que usa el filesystem MCP)
+            cmd = ['git', 'diff', '--name-only', '--relative', since]
             result = subprocess.run(
                 cmd,
                 cwd=self.repo_path,
@@ -227,14 +488,67 @@ class GitMCPAdapter(MCPAdapter):
                 text=True,
                 timeout=5
             )
-            
-            files = result.stdout.strip().split('\n')
-            return [f for f in files if f.endswith('.py')]
-        
+
+            files = {f for f in result.stdout.strip().split('\n') if f.endswith('.py')}
+
+            # Archivos nuevos sin trackear (git diff no los ve)
+            cmd = ['git', 'ls-files', '--others', '--exclude-standard', '--', '*.py']
+            result = subprocess.run(
+                cmd,
+                cwd=self.repo_path,
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+            files.update(f for f in result.stdout.strip().split('\n') if f)
+
+            return sorted(files)
+
         except Exception as e:
             print(f"[GitMCP] Error: {e}")
             return []
-    
+
+    def get_head_commit(self) -> Optional[str]:
+        """SHA del commit actual (para marcar hasta dónde se analizó)"""
+        if not self.enabled:
+            return None
+
+        try:
+            result = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'],
+                cwd=self.repo_path,
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+            sha = result.stdout.strip()
+            return sha or None
+
+        except Exception:
+            return None
+
+    def is_worktree_clean(self) -> bool:
+        """
+        True si no hay cambios sin commitear (solo .py).
+
+        Sin cache: el working tree puede cambiar sin mover HEAD.
+        """
+        if not self.enabled:
+            return False
+
+        try:
+            result = subprocess.run(
+                ['git', 'status', '--porcelain', '--', '*.py'],
+                cwd=self.repo_path,
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+            return result.returncode == 0 and not result.stdout.strip()
+
+        except Exception:
+            return False
+
     def get_file_history(self, file_path: str, limit: int = 10) -> List[Dict[str, str]]:
         """
         Historial de cambios de un archivo
@@ -245,7 +559,12 @@ class GitMCPAdapter(MCPAdapter):
         """
         if not self.enabled:
             return []
-        
+
+        cache_key = ('history', self.get_head_commit(), file_path, limit)
+        cached = self._query_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
             cmd = [
                 'git', 'log',
@@ -272,18 +591,81 @@ class GitMCPAdapter(MCPAdapter):
                         'date': date,
                         'message': message
                     })
-            
+
+            self._query_cache[cache_key] = history
             return history
-        
+
         except Exception as e:
             print(f"[GitMCP] Error: {e}")
             return []
-    
+
+    def get_files_history(self, limit_commits: int = 500) -> Dict[str, List[Dict[str, str]]]:
+        """
+        Historial reciente de TODOS los archivos en una sola invocación.
+
+        VENTAJA: un solo fork de git (--name-only agrupa los archivos
+        tocados por commit) en vez de uno por componente — el spawn de
+        ~20-50ms se paga una vez. Cacheado por HEAD como el resto.
+        """
+        if not self.enabled:
+            return {}
+
+        cache_key = ('files_history', self.get_head_commit(), limit_commits)
+        cached = self._query_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            cmd = [
+                'git', 'log',
+                f'--max-count={limit_commits}',
+                '--name-only',
+                '--pretty=format:COMMIT|%H|%an|%ai|%s'
+            ]
+            result = subprocess.run(
+                cmd,
+                cwd=self.repo_path,
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+
+            by_file: Dict[str, List[Dict[str, str]]] = {}
+            current = None
+            for line in result.stdout.splitlines():
+                if line.startswith('COMMIT|'):
+                    _, hash_val, author, date, message = line.split('|', 4)
+                    current = {
+                        'commit': hash_val,
+                        'author': author,
+                        'date': date,
+                        'message': message
+                    }
+                elif line and current is not None:
+                    # Indexar por ruta completa y por basename (los
+                    # componentes de Shadow son nombres de archivo)
+                    by_file.setdefault(line, []).append(current)
+                    base = line.rsplit('/', 1)[-1]
+                    if base != line:
+                        by_file.setdefault(base, []).append(current)
+
+            self._query_cache[cache_key] = by_file
+            return by_file
+
+        except Exception as e:
+            print(f"[GitMCP] Error: {e}")
+            return {}
+
     def get_last_commit_date(self) -> Optional[str]:
         """Fecha del último commit (para cache invalidation)"""
         if not self.enabled:
             return None
-        
+
+        cache_key = ('last_date', self.get_head_commit())
+        cached = self._query_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
             cmd = ['git', 'log', '-1', '--format=%ai']
             result = subprocess.run(
@@ -293,9 +675,11 @@ class GitMCPAdapter(MCPAdapter):
                 text=True,
                 timeout=5
             )
-            
-            return result.stdout.strip()
-        
+
+            date = result.stdout.strip()
+            self._query_cache[cache_key] = date
+            return date
+
         except:
             return None
 
@@ -304,22 +688,33 @@ class SQLiteCacheMCPAdapter(MCPAdapter):
     """
     Adaptador para cache eficiente con SQLite
     VENTAJA: Cache persistente, queries rápidas
+
+    Usa UNA conexión persistente en modo WAL: los lectores no bloquean
+    al escritor y cada commit es un append al write-ahead log en vez de
+    reescribir páginas del archivo principal. Las escrituras se acumulan
+    y se vuelcan en UNA transacción (un fsync para N archivos, no N).
     """
-    
+
+    FLUSH_EVERY = 64  # escrituras pendientes antes de volcar
+
     def __init__(self, db_path: str = "shadow_cache.db", enabled: bool = True):
         super().__init__(enabled)
         self.db_path = db_path
-        
+        self._conn = None
+        self._pending = {}  # file_path -> (last_modified, analysis_data)
+
         if enabled:
             self._init_db()
-    
+
     def _init_db(self):
-        """Inicializar base de datos SQLite"""
+        """Inicializar base de datos SQLite (conexión persistente + WAL)"""
         import sqlite3
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        cursor = self._conn.cursor()
+
         # Tabla de cache de análisis
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS analysis_cache (
@@ -329,7 +724,7 @@ class SQLiteCacheMCPAdapter(MCPAdapter):
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
-        
+
         # Tabla de búsquedas recientes
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS search_cache (
@@ -338,63 +733,197 @@ class SQLiteCacheMCPAdapter(MCPAdapter):
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
-        
-        conn.commit()
-        conn.close()
-    
+
+        # Metadatos clave/valor (ej: último commit analizado)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+
+        # Símbolos columnares (clases/funciones por archivo) con índice
+        # por nombre: búsqueda estructural vía SQL O(log N) sin cargar
+        # ni deserializar los análisis completos
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS symbols (
+                file_path TEXT,
+                kind TEXT,
+                name TEXT,
+                name_lc TEXT
+            )
+        ''')
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_symbols_name_lc ON symbols (name_lc)')
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_symbols_file ON symbols (file_path)')
+
+        self._conn.commit()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Leer un metadato clave/valor"""
+        if not self.enabled or self._conn is None:
+            return None
+
+        try:
+            row = self._conn.execute(
+                'SELECT value FROM meta WHERE key = ?', (key,)
+            ).fetchone()
+            return row[0] if row else None
+
+        except Exception as e:
+            print(f"[SQLiteCache] Error: {e}")
+            return None
+
+    def set_meta(self, key: str, value: str):
+        """Escribir un metadato clave/valor"""
+        if not self.enabled or self._conn is None:
+            return
+
+        try:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                (key, value)
+            )
+            self._conn.commit()
+
+        except Exception as e:
+            print(f"[SQLiteCache] Error: {e}")
+
     def get_cached_analysis(self, file_path: str, last_modified: str) -> Optional[Dict]:
         """
         Obtiene análisis cacheado si está actualizado
-        
+
         VENTAJA: Evita re-analizar archivos sin cambios
         """
-        if not self.enabled:
+        if not self.enabled or self._conn is None:
             return None
-        
+
+        # Lo pendiente de volcar también es cache válido
+        pending = self._pending.get(file_path)
+        if pending is not None:
+            if pending[0] == last_modified:
+                return pending[1]
+            return None
+
         try:
-            import sqlite3
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
+            cursor = self._conn.execute(
                 'SELECT analysis_data, last_modified FROM analysis_cache WHERE file_path = ?',
                 (file_path,)
             )
-            
+
             result = cursor.fetchone()
-            conn.close()
-            
+
             if result and result[1] == last_modified:
-                return json.loads(result[0])
-            
+                return _loads(result[0])
+
             return None
-        
+
         except Exception as e:
             print(f"[SQLiteCache] Error: {e}")
             return None
-    
+
+    def get_cached(self, file_path: str) -> Optional[tuple]:
+        """
+        Obtiene (clave, análisis) cacheados sin exigir igualdad exacta.
+
+        El llamador decide la validez (ej: fast-path por mtime con
+        fallback a hash de contenido).
+        """
+        if not self.enabled or self._conn is None:
+            return None
+
+        pending = self._pending.get(file_path)
+        if pending is not None:
+            return pending
+
+        try:
+            cursor = self._conn.execute(
+                'SELECT last_modified, analysis_data FROM analysis_cache WHERE file_path = ?',
+                (file_path,)
+            )
+            result = cursor.fetchone()
+            if result:
+                return (result[0], _loads(result[1]))
+            return None
+
+        except Exception as e:
+            print(f"[SQLiteCache] Error: {e}")
+            return None
+
     def cache_analysis(self, file_path: str, last_modified: str, analysis_data: Dict):
-        """Cachear resultado de análisis"""
-        if not self.enabled:
+        """Cachear resultado de análisis (se vuelca en lotes)"""
+        if not self.enabled or self._conn is None:
             return
-        
+
+        self._pending[file_path] = (last_modified, analysis_data)
+        if len(self._pending) >= self.FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        """Volcar escrituras pendientes en una sola transacción"""
+        if not self._pending or self._conn is None:
+            return
+
         try:
-            import sqlite3
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            self._conn.executemany('''
                 INSERT OR REPLACE INTO analysis_cache (file_path, last_modified, analysis_data)
                 VALUES (?, ?, ?)
-            ''', (file_path, last_modified, json.dumps(analysis_data)))
-            
-            conn.commit()
-            conn.close()
-        
+            ''', [
+                (path, modified, _dumps(data))
+                for path, (modified, data) in self._pending.items()
+            ])
+
+            # Refrescar la tabla columnar de símbolos (delete + insert
+            # por archivo, dentro de la misma transacción)
+            self._conn.executemany(
+                'DELETE FROM symbols WHERE file_path = ?',
+                [(path,) for path in self._pending])
+            symbol_rows = []
+            for path, (_, data) in self._pending.items():
+                for kind, section in (('class', 'classes'), ('function', 'functions')):
+                    for info in data.get(section, []):
+                        if isinstance(info, dict) and info.get('name'):
+                            name = info['name']
+                            symbol_rows.append((path, kind, name, name.lower()))
+            if symbol_rows:
+                self._conn.executemany(
+                    'INSERT INTO symbols (file_path, kind, name, name_lc) VALUES (?, ?, ?, ?)',
+                    symbol_rows)
+
+            self._conn.commit()
+            self._pending.clear()
+
+        except Exception as e:
+            print(f"[SQLiteCache] Error: {e}")
+
+    def query_symbols(self, query: str) -> List[tuple]:
+        """
+        Búsqueda de símbolos por subcadena (case-insensitive) vía índice.
+
+        Devuelve tuplas (file_path, kind, name) sin deserializar los
+        análisis completos — O(resultado) contra la tabla columnar.
+        """
+        if not self.enabled or self._conn is None:
+            return []
+
+        try:
+            self.flush()
+            return self._conn.execute(
+                'SELECT file_path, kind, name FROM symbols WHERE name_lc LIKE ?',
+                (f'%{query.lower()}%',)
+            ).fetchall()
+
         except Exception as e:
             print(f"[SQLiteCache] Error: {e}")
+            return []
+
+    def close(self):
+        """Volcar pendientes y cerrar la conexión"""
+        if self._conn is not None:
+            self.flush()
+            self._conn.close()
+            self._conn = None
 
 
 # === FACTORY PARA CREAR ADAPTADORES ===
@@ -420,9 +949,10 @@ class MCPFactory:
         }
         
         # Reportar qué está disponible
-        print("[MCPFactory] Adaptadores inicializados:")
-        for name, adapter in adapters.items():
-            status = "✅ Activo" if adapter.enabled else "❌ Deshabilitado"
-            print(f"  {name}: {status}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Adaptadores inicializados:")
+            for name, adapter in adapters.items():
+                status = "✅ Activo" if adapter.enabled else "❌ Deshabilitado"
+                logger.debug("  %s: %s", name, status)
         
         return adapters
\ No newline at end of file
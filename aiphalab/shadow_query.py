@@ -0,0 +1,637 @@
+# aiphalab/shadow_query.py
+"""
+ShadowQuery - Consulta básica de la memoria de Shadow (sin MCPs).
+
+Fallback ligero de Hybrid: carga el log de memoria ya generado y
+responde consultas estructurales sin tocar git/ripgrep/SQLite.
+Pensado para entornos donde solo hace falta LEER el análisis
+(ej: gemini_integration en "modo básico").
+
+VENTAJA: los índices invertidos se construyen UNA vez al cargar;
+después cada consulta es O(1)/O(resultado) en vez de re-escanear
+la memoria completa entrada a entrada.
+"""
+
+import io
+import json
+import os
+import pickle
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# orjson es opcional: decodifica ~2-4x más rápido que la stdlib y
+# query_shadow re-carga la memoria en cada llamada
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# ijson es opcional: parsea arrays JSON legacy en streaming, sin
+# materializar el archivo completo + todos los dicts de golpe
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Arrays legacy por debajo de este tamaño se decodifican de golpe con
+# orjson (más rápido); por encima, en streaming con ijson (menos RSS)
+_STREAM_THRESHOLD = 100 * (1 << 20)
+
+# numpy es opcional: vectoriza las estadísticas de complejidad
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# pyahocorasick es opcional: con K keywords, un autómata testea todas
+# en UNA pasada por string en vez de K chequeos `in` por nombre
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Separa CamelCase y dígitos para el índice de tokens
+_TOKEN_RE = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+
+# Separadores de rutas de import ('pkg.mod', 'pkg/mod')
+_IMPORT_SPLIT_RE = re.compile(r'[.\s/]+')
+
+class Entry:
+    """
+    Registro compacto de una entrada de memoria.
+
+    __slots__ en vez de dict por fila: ~3x menos bytes por entrada y
+    mejor localidad de cache al escanear; solo viven los campos que
+    ShadowQuery consulta (los hashes de cadena, timestamps y metadata
+    de agente se descartan al decodificar).
+    """
+    __slots__ = ('component', 'entry_category', 'action', 'details')
+
+    def __init__(self, component, entry_category, action, details):
+        self.component = component
+        self.entry_category = entry_category
+        self.action = action
+        self.details = details
+
+    def __getstate__(self):
+        return (self.component, self.entry_category, self.action, self.details)
+
+    def __setstate__(self, state):
+        self.component, self.entry_category, self.action, self.details = state
+
+
+def _intern(value):
+    """sys.intern defensivo (los campos pueden venir None o no-str)"""
+    return sys.intern(value) if type(value) is str else value
+
+
+def _slim(entry: Dict[str, Any]) -> Entry:
+    """
+    Representación compacta de una entrada (solo campos consultados).
+
+    component/entry_category/action toman pocos valores distintos pero
+    el decoder JSON aloca un string nuevo por entrada; internarlos
+    colapsa los duplicados a un objeto compartido y vuelve los `==`
+    de las pasadas de indexado comparaciones de puntero.
+    """
+    return Entry(_intern(entry.get('component')),
+                 _intern(entry.get('entry_category')),
+                 _intern(entry.get('action')), entry.get('details'))
+
+
+def _tokenize(name: str) -> List[str]:
+    """Tokens en minúsculas de un identificador (CamelCase/snake_case)"""
+    tokens = []
+    for part in name.split('_'):
+        tokens.extend(t.lower() for t in _TOKEN_RE.findall(part))
+    return tokens
+
+
+class ShadowQuery:
+    """
+    Lector de la memoria de Shadow con índices invertidos.
+
+    Índices construidos en carga:
+    - _by_component: componente → índices de entradas (reciente primero)
+    - _classes_index / _functions_index / _imports_index: componente → nombres
+    - _class_to_components / _function_to_components: nombre.lower() → componentes
+    - _token_index: token → set de componentes (para search_by_keyword)
+    """
+
+    # Atributos volcados al sidecar .idx (índices + memoria adelgazada)
+    # Subir cuando cambie el formato de los índices: invalida sidecars
+    # escritos con el esquema anterior y fuerza un rebuild limpio
+    _INDEX_CACHE_VERSION = 2
+
+    _PICKLED_ATTRS = (
+        'memory', '_by_component', '_classes_index', '_functions_index',
+        '_imports_index', '_class_to_components', '_function_to_components',
+        '_token_index', '_lc_symbols', '_lc_blobs', '_latest_details',
+        '_import_tokens',
+    )
+
+    def __init__(self, memory_file: str = "aiphalab_memory.jsonl"):
+        self.memory_file = Path(memory_file)
+        self.memory: List[Entry] = []
+        if not self._load_index_cache():
+            self._load_memory()
+            self._build_indexes()
+            self._write_index_cache()
+
+    # === CARGA ===
+
+    def _stat_key(self) -> Optional[tuple]:
+        """(mtime_ns, size) del archivo de memoria, o None si no existe"""
+        try:
+            st = self.memory_file.stat()
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _index_cache_path(self) -> Path:
+        return self.memory_file.with_suffix('.idx')
+
+    def _load_index_cache(self) -> bool:
+        """
+        Restaurar memoria + índices desde el sidecar pickle.
+
+        VENTAJA: arranques posteriores se saltan el parseo JSON y la
+        construcción de índices completos. Clave de validez: (mtime_ns,
+        tamaño) del archivo de memoria — cero riesgo de servir índices
+        de una memoria distinta.
+        """
+        key = self._stat_key()
+        if key is None:
+            return False
+        try:
+            with open(self._index_cache_path(), 'rb') as f:
+                data = pickle.load(f)
+            if (data.get('key') != key
+                    or data.get('version') != self._INDEX_CACHE_VERSION):
+                return False
+            for attr in self._PICKLED_ATTRS:
+                setattr(self, attr, data[attr])
+        except (OSError, KeyError, pickle.UnpicklingError, EOFError,
+                AttributeError, ImportError):
+            return False
+        self._components_cache = None
+        self._summary = None
+        return True
+
+    def _write_index_cache(self):
+        """Volcar memoria + índices al sidecar (write + replace atómico)"""
+        key = self._stat_key()
+        if key is None:
+            return
+        data = {'key': key, 'version': self._INDEX_CACHE_VERSION}
+        for attr in self._PICKLED_ATTRS:
+            data[attr] = getattr(self, attr)
+        tmp_path = self._index_cache_path().with_suffix('.idx.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._index_cache_path())
+        except OSError:
+            pass
+
+    def _load_memory(self):
+        """
+        Cargar memoria (JSONL, con fallback a array JSON legacy).
+
+        Las entradas se adelgazan con _slim al decodificar; los arrays
+        legacy se parsean en streaming con ijson cuando está instalado,
+        así nunca viven en memoria el buffer crudo y la lista decodificada
+        completa a la vez.
+        """
+        self.memory = []
+        try:
+            if not self.memory_file.exists():
+                return
+            with open(self.memory_file, 'rb') as f:
+                head = f.read(64)
+                f.seek(0)
+                if not head.strip():
+                    return
+                if head.lstrip()[:1] == b'[':
+                    size = self.memory_file.stat().st_size
+                    if ijson is not None and size >= _STREAM_THRESHOLD:
+                        self.memory = [_slim(e) for e in ijson.items(f, 'item')]
+                    else:
+                        self.memory = [_slim(e) for e in _loads(f.read())]
+                else:
+                    self.memory = [_slim(_loads(line))
+                                   for line in f if line.strip()]
+        except (OSError, ValueError) as e:
+            print(f"[ShadowQuery] Error cargando memoria: {e}")
+            self.memory = []
+
+    def _build_indexes(self):
+        """Una pasada sobre la memoria → todos los índices invertidos"""
+        self._by_component: Dict[str, List[int]] = defaultdict(list)
+        self._classes_index: Dict[str, Tuple[str, ...]] = {}
+        self._functions_index: Dict[str, Tuple[str, ...]] = {}
+        self._imports_index: Dict[str, List[str]] = {}
+        self._class_to_components: Dict[str, List[str]] = defaultdict(list)
+        self._function_to_components: Dict[str, List[str]] = defaultdict(list)
+        self._token_index: Dict[str, set] = defaultdict(set)
+        self._import_tokens: Dict[str, set] = {}
+        # Tabla (nombre_lc, componente) precomputada: search_by_keyword
+        # hace sus chequeos de substring sobre strings ya minusculados,
+        # sin un .lower() por nombre por consulta
+        self._lc_symbols: List[tuple] = []
+
+        # Materialización "último análisis por componente": se llena en
+        # la misma pasada, así get_component_details es un .get directo
+        # sin recorrer entradas. La lista ordenada se memoiza aparte y
+        # ambos se reinician aquí mismo, así reload() los invalida.
+        self._latest_details: Dict[str, Dict[str, Any]] = {}
+        self._components_cache: Optional[List[str]] = None
+        self._summary: Optional[Dict[str, Any]] = None
+
+        # Recorrido de reciente a antiguo: _by_component queda ordenado
+        # reciente-primero y solo el análisis más nuevo de cada
+        # componente alimenta los índices de nombres
+        for idx in range(len(self.memory) - 1, -1, -1):
+            entry = self.memory[idx]
+            component = entry.component
+            if not component:
+                continue
+            self._by_component[component].append(idx)
+            if (entry.entry_category != 'CODE_ANALYSIS'
+                    or component in self._classes_index):
+                continue
+            details = entry.details or {}
+
+            # Nombres también internados: el mismo símbolo analizado en
+            # N versiones de un archivo comparte un único string
+            # Tuplas inmutables: menos memoria que listas y hasheables,
+            # así los valores sirven de clave en cachés aguas abajo
+            class_names = tuple(_intern(c.get('name')) for c in details.get('classes', [])
+                                if isinstance(c, dict) and c.get('name'))
+            func_names = tuple(_intern(f.get('name')) for f in details.get('functions', [])
+                               if isinstance(f, dict) and f.get('name'))
+            imports = details.get('imports_flat')
+            if imports is None:
+                imports = sorted({imp.get('module') for imp in details.get('imports', [])
+                                  if isinstance(imp, dict) and imp.get('module')})
+            imports = [_intern(m) for m in imports]
+            # Tokens canónicos de los imports, precomputados: la
+            # construcción de relaciones hace lookups de set en vez de
+            # re-tokenizar cada import en cada llamada
+            self._import_tokens[component] = {
+                token for imp in imports
+                for token in _IMPORT_SPLIT_RE.split(imp) if token
+            }
+
+            # La entrada más reciente de un componente manda
+            self._latest_details[component] = details
+            self._classes_index[component] = class_names
+            self._functions_index[component] = func_names
+            self._imports_index[component] = imports
+
+            for name in class_names:
+                name_lc = name.lower()
+                self._class_to_components[name_lc].append(component)
+                self._lc_symbols.append((name_lc, component))
+                for token in _tokenize(name):
+                    self._token_index[token].add(component)
+            for name in func_names:
+                name_lc = name.lower()
+                self._function_to_components[name_lc].append(component)
+                self._lc_symbols.append((name_lc, component))
+                for token in _tokenize(name):
+                    self._token_index[token].add(component)
+            self._lc_symbols.append((component.lower(), component))
+            for token in _tokenize(component.rsplit('.', 1)[0]):
+                self._token_index[token].add(component)
+
+        # Blob lowercase por componente: el fallback de substring hace
+        # UN `in` (memmem en C) por componente sobre su blob en vez de
+        # un chequeo por símbolo
+        blobs: Dict[str, List[str]] = defaultdict(list)
+        for name_lc, component in self._lc_symbols:
+            blobs[component].append(name_lc)
+        self._lc_blobs: Dict[str, str] = {
+            component: '\n'.join(names) for component, names in blobs.items()
+        }
+
+        # Congelar como dicts planos: las consultas solo hacen .get y
+        # un defaultdict vivo insertaría claves en cada miss accidental
+        self._by_component = dict(self._by_component)
+        self._class_to_components = dict(self._class_to_components)
+        self._function_to_components = dict(self._function_to_components)
+        self._token_index = dict(self._token_index)
+
+    def reload(self):
+        """Recargar memoria e índices desde disco (refresca el sidecar)"""
+        self._load_memory()
+        self._build_indexes()
+        self._write_index_cache()
+
+    # === CONSULTAS ===
+
+    def get_all_components(self) -> List[str]:
+        """Componentes con análisis registrado (lista ordenada, memoizada)"""
+        if self._components_cache is None:
+            self._components_cache = sorted(self._classes_index)
+        return self._components_cache
+
+    def get_all_classes(self) -> Dict[str, Tuple[str, ...]]:
+        """Clases por componente"""
+        return dict(self._classes_index)
+
+    def get_all_functions(self) -> Dict[str, Tuple[str, ...]]:
+        """Funciones por componente"""
+        return dict(self._functions_index)
+
+    def get_component_details(self, component: str) -> Optional[Dict[str, Any]]:
+        """Análisis más reciente de un componente (dict materializado)"""
+        return self._latest_details.get(component)
+
+    def find_class(self, class_name: str) -> List[Dict[str, str]]:
+        """Componentes que definen una clase (lookup O(1))"""
+        return [{'component': c, 'class': class_name}
+                for c in self._class_to_components.get(class_name.lower(), ())]
+
+    def find_function(self, function_name: str) -> List[Dict[str, str]]:
+        """Componentes que definen una función (lookup O(1))"""
+        return [{'component': c, 'function': function_name}
+                for c in self._function_to_components.get(function_name.lower(), ())]
+
+    def search_by_keyword(self, keyword: str) -> List[str]:
+        """
+        Componentes cuyos nombres/símbolos contienen los tokens del
+        keyword (intersección de sets del índice de tokens), con
+        fallback a substring sobre la tabla lowercase precomputada
+        para fragmentos que no son tokens completos.
+        """
+        tokens = _tokenize(keyword)
+        if not tokens:
+            return []
+        sets = [self._token_index.get(t, set()) for t in tokens]
+        if all(sets):
+            return sorted(set.intersection(*sets))
+        # Fragmento parcial (ej: 'adapt' en 'Adapter'): primero la unión
+        # de sets de los tokens que contienen el fragmento (sin escanear
+        # símbolos); después un solo `in` por componente restante sobre
+        # su blob para fragmentos que cruzan límites de token
+        keyword_lc = keyword.lower()
+        candidates = set()
+        for token, components in self._token_index.items():
+            if keyword_lc in token:
+                candidates.update(components)
+        for component, blob in self._lc_blobs.items():
+            if component not in candidates and keyword_lc in blob:
+                candidates.add(component)
+        return sorted(candidates)
+
+    def search_by_keywords(self, keywords: List[str]) -> Dict[str, List[str]]:
+        """
+        Búsqueda multi-keyword: keyword → componentes que lo contienen.
+
+        Con pyahocorasick instalado, las K keywords se compilan en un
+        autómata y cada nombre indexado se recorre UNA vez (O(L) por
+        string en vez de O(K·L)); sin él, K chequeos `in` por nombre
+        sobre la tabla lowercase. Una sola keyword usa el camino rápido
+        de search_by_keyword.
+        """
+        if not keywords:
+            return {}
+        if len(keywords) == 1:
+            return {keywords[0]: self.search_by_keyword(keywords[0])}
+
+        lc_map = {kw.lower(): kw for kw in keywords}
+        results: Dict[str, set] = {kw: set() for kw in keywords}
+
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for kw_lc, kw in lc_map.items():
+                automaton.add_word(kw_lc, kw)
+            automaton.make_automaton()
+            for name_lc, component in self._lc_symbols:
+                for _, kw in automaton.iter(name_lc):
+                    results[kw].add(component)
+        else:
+            for name_lc, component in self._lc_symbols:
+                for kw_lc, kw in lc_map.items():
+                    if kw_lc in name_lc:
+                        results[kw].add(component)
+
+        return {kw: sorted(components) for kw, components in results.items()}
+
+    def get_dependencies(self, component: str) -> List[str]:
+        """Módulos importados por un componente"""
+        return self._imports_index.get(component, [])
+
+    def get_component_relationships(self) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Mapa imports/imported_by entre componentes del sistema.
+
+        Una sola pasada: base→componente precomputado y lookup por
+        token de cada import — O(imports totales) en vez del
+        componente×componente por import de la versión ingenua.
+        """
+        components = [c for c in self.get_all_components() if c.endswith('.py')]
+        base_to_component = {c[:-3]: c for c in components}
+
+        relationships: Dict[str, Dict[str, List[str]]] = {
+            c: {'imports': [], 'imported_by': []} for c in components
+        }
+        for component in components:
+            rel_imports = relationships[component]['imports']
+            for token in self._import_tokens.get(component, ()):
+                other = base_to_component.get(token)
+                if other and other != component:
+                    rel_imports.append(other)
+
+        # Mapa inverso por inversión directa del forward
+        for component, rel in relationships.items():
+            for imported in rel['imports']:
+                relationships[imported]['imported_by'].append(component)
+        return relationships
+
+    def get_system_overview(self) -> Dict[str, Any]:
+        """Resumen global: componentes, clases, funciones, LOC"""
+        summary = self._compute_summary()
+        by_component = summary['by_component']
+        return {
+            'total_components': len(by_component),
+            'total_classes': sum(m['classes'] for m in by_component.values()),
+            'total_functions': sum(m['functions'] for m in by_component.values()),
+            'total_lines': summary['total_lines'],
+        }
+
+    def get_complexity_analysis(self) -> Dict[str, Any]:
+        """Métricas de complejidad (resumen compartido memoizado)"""
+        return self._compute_summary()
+
+    def _compute_summary(self) -> Dict[str, Any]:
+        """
+        Métricas de complejidad por componente y extremos globales.
+
+        Se computa UNA vez por carga y lo comparten get_system_overview
+        y get_complexity_analysis — llamadas CLI consecutivas sobre la
+        misma instancia pagan la pasada una sola vez.
+
+        Con NumPy instalado, sumas/medias/argmax corren vectorizados
+        sobre arrays int64 (una pasada en C, sin lookups de dict por
+        iteración); sin NumPy se conserva el fold en Python puro.
+        """
+        if self._summary is not None:
+            return self._summary
+
+        rows = []  # (component, complexity, loc, n_classes, n_functions)
+        for component in self.get_all_components():
+            details = self.get_component_details(component)
+            if not details:
+                continue
+            stats = details.get('stats', {})
+            rows.append((component,
+                         stats.get('complexity', 0),
+                         stats.get('lines_of_code', 0),
+                         len(details.get('classes', [])),
+                         len(details.get('functions', []))))
+
+        if not rows:
+            self._summary = {'by_component': {}, 'ranking': [],
+                             'largest_file': None, 'most_classes': None,
+                             'most_functions': None,
+                             'total_lines': 0, 'average_lines': 0}
+            return self._summary
+
+        components = [r[0] for r in rows]
+        by_component = {
+            c: {'complexity': cx, 'lines_of_code': loc,
+                'classes': nc, 'functions': nf}
+            for c, cx, loc, nc, nf in rows
+        }
+
+        if np is not None:
+            n = len(rows)
+            complexity = np.fromiter((r[1] for r in rows), dtype=np.int64, count=n)
+            loc = np.fromiter((r[2] for r in rows), dtype=np.int64, count=n)
+            n_classes = np.fromiter((r[3] for r in rows), dtype=np.int64, count=n)
+            n_functions = np.fromiter((r[4] for r in rows), dtype=np.int64, count=n)
+            ranking = [components[i]
+                       for i in np.argsort(-complexity, kind='stable')]
+            self._summary = {
+                'by_component': by_component,
+                'ranking': ranking,
+                'largest_file': components[int(loc.argmax())],
+                'most_classes': components[int(n_classes.argmax())],
+                'most_functions': components[int(n_functions.argmax())],
+                'total_lines': int(loc.sum()),
+                'average_lines': float(loc.mean()),
+            }
+            return self._summary
+
+        best_loc = best_classes = best_functions = (None, -1)
+        total_loc = 0
+        for component, _, loc, nc, nf in rows:
+            total_loc += loc
+            if loc > best_loc[1]:
+                best_loc = (component, loc)
+            if nc > best_classes[1]:
+                best_classes = (component, nc)
+            if nf > best_functions[1]:
+                best_functions = (component, nf)
+        ranking = sorted(by_component,
+                         key=lambda c: by_component[c]['complexity'],
+                         reverse=True)
+        self._summary = {
+            'by_component': by_component,
+            'ranking': ranking,
+            'largest_file': best_loc[0],
+            'most_classes': best_classes[0],
+            'most_functions': best_functions[0],
+            'total_lines': total_loc,
+            'average_lines': total_loc / len(rows),
+        }
+        return self._summary
+
+    # === CONTEXTO PARA LLM ===
+
+    def iter_context_for_gemini(self, focus: Optional[str] = None) -> Iterator[str]:
+        """
+        Render perezoso del contexto, un bloque por componente.
+
+        Cada componente se formatea con UNA f-string multilínea (una sola
+        asignación de string en vez de ~5 appends), y solo cuando el
+        consumidor lo pide: un caller con presupuesto de tokens corta el
+        generador y los componentes restantes ni se formatean.
+        """
+        yield "=== AIPHA_0.0.1 SYSTEM CONTEXT (BASIC) ===\n"
+        overview = self.get_system_overview()
+        yield f"Total Components: {overview['total_components']}\n"
+        yield "=== COMPONENTS ==="
+
+        for component in self.get_all_components():
+            if focus and component != focus:
+                continue
+            details = self.get_component_details(component)
+            if not details:
+                continue
+            desc = details.get('docstrings', {}).get('module')
+            classes = self._classes_index.get(component)
+            functions = self._functions_index.get(component)
+            imports = self._imports_index.get(component)
+            yield (
+                f"\n[{component}]"
+                + (f"\n  Description: {desc[:100]}..." if desc else "")
+                + f"\n  Classes: {', '.join(classes) if classes else '-'}"
+                f"\n  Functions: {', '.join(functions) if functions else '-'}"
+                f"\n  Imports: {', '.join(imports) if imports else '-'}"
+            )
+
+    def get_context_for_gemini(self, focus: Optional[str] = None) -> str:
+        """Render completo del contexto (join del generador)"""
+        return '\n'.join(self.iter_context_for_gemini(focus))
+
+    def get_context_truncated(self, max_chars: int,
+                              focus: Optional[str] = None) -> str:
+        """
+        Contexto acotado a un presupuesto de caracteres.
+
+        Corta el generador al agotar el presupuesto: las secciones que
+        el LLM descartaría no llegan a construirse.
+        """
+        buf = io.StringIO()
+        written = 0
+        for line in self.iter_context_for_gemini(focus):
+            cost = len(line) + 1
+            if written + cost > max_chars:
+                break
+            buf.write(line)
+            buf.write('\n')
+            written += cost
+        return buf.getvalue().rstrip('\n')
+
+
+# Instancias vivas keyed por ruta: (mtime_ns de la memoria, instancia).
+# Mientras el archivo no cambie, llamadas repetidas reutilizan los
+# índices ya construidos en vez de re-parsear el JSON por consulta.
+_INSTANCE_CACHE: Dict[str, tuple] = {}
+
+
+def _get_instance(memory_file: str) -> ShadowQuery:
+    """ShadowQuery compartido para memory_file, invalidado por mtime"""
+    try:
+        mtime = Path(memory_file).stat().st_mtime_ns
+    except OSError:
+        mtime = None
+    cached = _INSTANCE_CACHE.get(memory_file)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    instance = ShadowQuery(memory_file)
+    _INSTANCE_CACHE[memory_file] = (mtime, instance)
+    return instance
+
+
+def query_shadow(keyword: str,
+                 memory_file: str = "aiphalab_memory.jsonl") -> List[str]:
+    """Atajo: búsqueda por keyword (instancia cacheada por mtime)"""
+    return _get_instance(memory_file).search_by_keyword(keyword)
@@ -9,12 +9,25 @@ import subprocess
 import tempfile
 import hashlib
 import json
+import re
+import functools
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+# blake3 es opcional: hashing SIMD (AVX2/AVX-512) varias veces más rápido
+# que SHA-256; mismo digest de 32 bytes, así que el fallback es transparente
+try:
+    from blake3 import blake3 as _new_hasher
+    _CHECKSUM_ALGO = "blake3"
+except ImportError:
+    _new_hasher = hashlib.sha256
+    _CHECKSUM_ALGO = "sha256"
+
 class ChangeStatus(Enum):
     SUCCESS = "success"
     ROLLBACK = "rollback"
@@ -48,19 +61,43 @@ class CriticalMemoryRules:
     Si falla cualquier paso: ROLLBACK AUTOMÁTICO.
     """
     
-    SNAPSHOTS_DIR = Path("core/snapshots")
+    # Snapshots en tmpfs (o donde diga AIPHA_SNAPSHOT_DIR): son puntos de
+    # restauración efímeros que viven solo durante un atomic_change, así
+    # que escribirlos a disco persistente es I/O (y desgaste) gratuito.
+    # Solo la metadata "promocionada" merecería almacenamiento persistente.
+    SNAPSHOTS_DIR = (Path(os.environ.get("AIPHA_SNAPSHOT_DIR",
+                                         tempfile.gettempdir()))
+                     / "aipha_snapshots")
     SNAPSHOTS_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Directorios que nunca viajan en un snapshot ni en un restore
+    SNAPSHOT_EXCLUDE_DIRS = frozenset({".git", "__pycache__", "snapshots"})
+    RESTORE_EXCLUDE_DIRS = frozenset({".git", "core"})
+
+    # Marcador de snapshot lógico respaldado por git (sin copia de archivos)
+    _GIT_SNAPSHOT = "<git:HEAD>"
     
     @classmethod
-    def atomic_change(cls, proposal: ChangeProposal) -> Tuple[ChangeStatus, str]:
+    def atomic_change(cls, proposal: ChangeProposal,
+                      repo_root: Optional[Path] = None) -> Tuple[ChangeStatus, str]:
         """
         Protocolo NO NEGOCIABLE para cambios al filesystem.
+
+        repo_root: raíz del proyecto a modificar; por defecto el cwd.
+        Pasarlo explícito evita os.chdir en los callers (el cwd es estado
+        compartido del proceso: con tests en paralelo, una carrera).
         """
+        repo_root = Path(repo_root) if repo_root is not None else Path.cwd()
         snapshot_id = None
         
         try:
-            # PASO 1: Snapshot (preservar estado)
-            snapshot = cls._create_snapshot()
+            # PASO 1: Snapshot (preservar estado). Si el repo está limpio
+            # y el diff solo toca archivos rastreados, HEAD ya es el punto
+            # de restauración: nos ahorramos la copia completa del árbol.
+            if cls._can_git_snapshot(proposal.diff_content, repo_root):
+                snapshot = cls._git_snapshot(repo_root)
+            else:
+                snapshot = cls._create_snapshot(repo_root)
             snapshot_id = snapshot.snapshot_id
             
             # PASO 2: Validación Pre-ejecución
@@ -68,37 +105,44 @@ class CriticalMemoryRules:
                 return cls._rollback(
                     snapshot_id, 
                     "Environment validation failed",
-                    snapshot
+                    snapshot,
+                    repo_root=repo_root
                 )
             
             
             # PASO 3: Dry Run Sintáctico
-            if not cls._syntax_check(proposal.diff_content):
+            if not cls._syntax_check(proposal.diff_content, repo_root):
                 return cls._rollback(
                     snapshot_id, 
                     "Syntax errors detected in diff",
-                    snapshot
+                    snapshot,
+                    proposal.diff_content,
+                    repo_root=repo_root
                 )
             
             # PASO 4: Aplicación Condicional
-            if not cls._apply_changes(proposal.diff_content):
+            if not cls._apply_changes(proposal.diff_content, repo_root):
                 return cls._rollback(
                     snapshot_id, 
                     "Failed to apply changes",
-                    snapshot
+                    snapshot,
+                    proposal.diff_content,
+                    repo_root=repo_root
                 )
             
             # PASO 5: Test Execution
-            test_result = cls._run_tests(proposal.test_plan)
+            test_result = cls._run_tests(proposal.test_plan, repo_root)
             if not test_result["passed"]:
                 return cls._rollback(
                     snapshot_id, 
                     f"Tests failed: {test_result['failures']}",
-                    snapshot
+                    snapshot,
+                    proposal.diff_content,
+                    repo_root=repo_root
                 )
             
             # ÉXITO: Confirmar cambios
-            cls._commit_changes(proposal.proposal_id, proposal.title)
+            cls._commit_changes(proposal.proposal_id, proposal.title, repo_root)
             return (ChangeStatus.SUCCESS, f"Changes applied successfully: {proposal.proposal_id}")
             
         except Exception as e:
@@ -106,38 +150,107 @@ class CriticalMemoryRules:
                 return cls._rollback(
                     snapshot_id,
                     f"Unexpected error: {str(e)}",
-                    snapshot
+                    snapshot,
+                    proposal.diff_content,
+                    repo_root=repo_root
                 )
             return (ChangeStatus.FAILED, f"Critical failure: {str(e)}")
     
     @classmethod
-    def _create_snapshot(cls) -> Snapshot:
-        """PASO 1: Crear snapshot completo del proyecto con rsync"""
+    def _iter_files(cls, root: Path):
+        """
+        Iterar archivos recursivamente con os.scandir.
+
+        VENTAJA sobre Path.rglob: DirEntry trae tipo de archivo cacheado
+        del propio getdents — sin stat extra ni un objeto Path por
+        entrada. Genera DirEntry; el caller decide qué materializar.
+        """
+        stack = [str(root)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry
+            except OSError:
+                continue
+
+    @staticmethod
+    def _link_or_copy(src, dst):
+        """
+        Hardlink si se puede, copia de bytes si no (EXDEV, FS sin links).
+
+        MEJORA: en la dirección backup→worktree el link es O(1) por
+        archivo en vez de O(bytes). Solo es correcto ahí porque el
+        backup se borra inmediatamente después de restaurar: el archivo
+        restaurado queda como único dueño del inode. En la dirección
+        contraria (worktree→backup) NUNCA: una escritura in-place
+        posterior (open con O_TRUNC) compartiría el inode y corrompería
+        el punto de restauración.
+        """
+        try:
+            if os.path.lexists(dst):
+                os.unlink(dst)
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+    @classmethod
+    def _copy_tree(cls, source: Path, destination: Path, exclude_dirs,
+                   copy_function=shutil.copy2) -> List[Path]:
+        """
+        Copiar un árbol de archivos en-proceso, podando directorios excluidos.
+
+        VENTAJA sobre rsync: sin proceso externo ni dependencia del binario;
+        shutil.copy2 usa sendfile/zero-copy del kernel y el walk poda
+        .git/__pycache__/snapshots antes de descender. Para el snapshot se
+        copian bytes (no hardlinks) a propósito: el árbol de trabajo se
+        edita in-place tras el snapshot y un hardlink compartiría el
+        inode, corrompiendo el punto de restauración. El restore puede
+        pasar copy_function=_link_or_copy (ver ahí por qué es seguro).
+
+        Devuelve la lista de rutas origen copiadas, para que el caller
+        pueda contar/hashear sin re-recorrer el árbol.
+        """
+        copied = []
+        for root, dirs, files in os.walk(source):
+            dirs[:] = [d for d in dirs if d not in exclude_dirs]
+            dest_dir = destination / Path(root).relative_to(source)
+            dest_dir.mkdir(parents=True, exist_ok=True)
+            for name in files:
+                if name.endswith(".pyc"):
+                    continue
+                src_file = Path(root) / name
+                copy_function(src_file, dest_dir / name)
+                copied.append(src_file)
+        return copied
+
+    @classmethod
+    def _create_snapshot(cls, repo_root: Optional[Path] = None) -> Snapshot:
+        """PASO 1: Crear snapshot completo del proyecto (copia en-proceso)"""
         try:
             # Ensure snapshots directory exists
             cls.SNAPSHOTS_DIR.mkdir(parents=True, exist_ok=True)
 
-            source_path = Path.cwd()
+            source_path = Path(repo_root) if repo_root is not None else Path.cwd()
             timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
             snapshot_id = f"snap_{timestamp}_{hashlib.md5(str(source_path).encode()).hexdigest()[:8]}"
             backup_path = cls.SNAPSHOTS_DIR / snapshot_id
-            
-            # Usar rsync para copia eficiente
-            rsync_cmd = [
-                "rsync", "-av", "--exclude", ".git", "--exclude", "__pycache__",
-                "--exclude", "*.pyc", "--exclude", "snapshots/",
-                f"{source_path}/", f"{backup_path}/"
-            ]
-            
-            result = subprocess.run(rsync_cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                raise RuntimeError(f"rsync failed: {result.stderr}")
-            
-            # Calcular checksum del directorio
-            checksum = cls._calculate_directory_checksum(source_path)
-            
-            # Contar archivos
-            file_count = sum(1 for _ in source_path.rglob("*") if _.is_file())
+
+            # Pasada única: la copia ya enumera los archivos, así que el
+            # conteo y el checksum reutilizan esa lista sin re-recorrer
+            # el árbol (antes: tres traversals para copiar/contar/hashear)
+            copied = cls._copy_tree(source_path, backup_path,
+                                    cls.SNAPSHOT_EXCLUDE_DIRS)
+            file_count = len(copied)
+            # Mismo filtro de dotfiles que _calculate_directory_checksum:
+            # el checksum del metadata debe ser reproducible con la API
+            # pública de checksum sobre el mismo árbol
+            checksum = cls._checksum_from_files(
+                source_path,
+                [p for p in copied if not p.name.startswith(".")])
             
             snapshot = Snapshot(
                 snapshot_id=snapshot_id,
@@ -156,7 +269,8 @@ class CriticalMemoryRules:
                     "timestamp": snapshot.timestamp,
                     "source_path": str(source_path),
                     "file_count": file_count,
-                    "checksum": checksum
+                    "checksum": checksum,
+                    "checksum_algo": _CHECKSUM_ALGO
                 }, f, indent=2)
             
             return snapshot
@@ -165,39 +279,140 @@ class CriticalMemoryRules:
             raise RuntimeError(f"Snapshot creation failed: {str(e)}")
     
     @classmethod
+    @functools.lru_cache(maxsize=1)
     def _validate_environment(cls) -> bool:
-        """PASO 2: Validar entorno de ejecución"""
+        """
+        PASO 2: Validar entorno de ejecución.
+
+        MEJORA: memoizado con lru_cache — las sondas (fork de git y
+        pytest) no cambian dentro del proceso, así que cada propuesta
+        posterior a la primera se ahorra ese coste fijo. Para re-sondear
+        (p.ej. en tests que mockean subprocess): cache_clear().
+        """
         try:
             # Verificar Python versión compatible
             if sys.version_info < (3, 8):
                 return False
-            
-            # Verificar git está disponible
-            result = subprocess.run(["git", "--version"], capture_output=True)
-            if result.returncode != 0:
-                return False
-            
-            # Verificar pytest está instalado
-            result = subprocess.run(["pytest", "--version"], capture_output=True)
-            if result.returncode != 0:
-                return False
-            
-            # Verificar rsync está disponible
-            result = subprocess.run(["rsync", "--version"], capture_output=True)
-            if result.returncode != 0:
-                return False
-            
-            return True
-            
+
+            # Sondas en paralelo: subprocess suelta el GIL, así el coste
+            # de la validación fría es el fork más lento, no la suma
+            probes = (["git", "--version"], ["pytest", "--version"])
+            with ThreadPoolExecutor(max_workers=len(probes)) as pool:
+                futures = [pool.submit(subprocess.run, cmd,
+                                       capture_output=True)
+                           for cmd in probes]
+                return all(f.result().returncode == 0 for f in futures)
+
         except Exception:
             return False
     
+    _DIFF_FILE_RE = re.compile(r"^\+\+\+ (?:b/)?(.+)$")
+    _DIFF_SOURCE_RE = re.compile(r"^--- (?:a/)?(.+)$")
+    _DIFF_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+\d+(?:,\d+)? @@")
+
+    @staticmethod
+    def _as_text(diff_content) -> str:
+        """Aceptar diffs como str o bytes (fixtures suelen ser bytes)"""
+        if isinstance(diff_content, bytes):
+            return diff_content.decode("utf-8")
+        return diff_content
+
+    @classmethod
+    def _iter_patched_sources(cls, diff_content: str,
+                              repo_root: Optional[Path] = None):
+        """
+        Reconstruir en memoria la post-imagen de cada archivo del diff.
+
+        Genera pares (ruta, contenido nuevo) sin tocar disco: la base se
+        lee del árbol actual (o vacía para archivos nuevos) y los hunks
+        se aplican sobre la lista de líneas.
+        """
+        lines = diff_content.splitlines()
+        i = 0
+        while i < len(lines):
+            match = cls._DIFF_SOURCE_RE.match(lines[i])
+            if not match:
+                i += 1
+                continue
+            source = match.group(1)
+            target_match = cls._DIFF_FILE_RE.match(lines[i + 1]) if i + 1 < len(lines) else None
+            if not target_match:
+                i += 1
+                continue
+            target = target_match.group(1)
+            i += 2
+
+            if source == "/dev/null":
+                base = []
+            else:
+                base_path = (Path(repo_root) / source if repo_root is not None
+                             else Path(source))
+                base = base_path.read_text().splitlines()
+
+            new_lines = []
+            pos = 0  # cursor 0-based sobre base
+            while i < len(lines):
+                hunk = cls._DIFF_HUNK_RE.match(lines[i])
+                if not hunk:
+                    break
+                src_start = int(hunk.group(1))
+                src_len = int(hunk.group(2)) if hunk.group(2) is not None else 1
+                # Con src_len == 0 el hunk inserta DESPUÉS de src_start
+                copy_until = src_start if src_len == 0 else src_start - 1
+                new_lines.extend(base[pos:copy_until])
+                pos = copy_until
+                i += 1
+                while i < len(lines) and lines[i][:1] in (" ", "+", "-", "\\", ""):
+                    line = lines[i]
+                    if cls._DIFF_SOURCE_RE.match(line) or cls._DIFF_HUNK_RE.match(line):
+                        break
+                    if line[:1] == "+":
+                        new_lines.append(line[1:])
+                    elif line[:1] == "-":
+                        pos += 1
+                    elif line[:1] == " " or line == "":
+                        new_lines.append(base[pos] if pos < len(base) else line[1:])
+                        pos += 1
+                    # las líneas '\ No newline...' se ignoran
+                    i += 1
+            new_lines.extend(base[pos:])
+
+            if target != "/dev/null":
+                yield target, "\n".join(new_lines) + "\n"
+
+    @classmethod
+    def _syntax_check(cls, diff_content: str,
+                      repo_root: Optional[Path] = None) -> bool:
+        """
+        PASO 3: Validar sintaxis del diff SIN materializarlo.
+
+        VENTAJA: la post-imagen de cada .py se reconstruye en memoria y
+        se compila directamente — nada de tempdir + git init + git apply
+        + rglob + lecturas por archivo. Si el diff trae algo que el
+        parser no entiende, se cae al dry-run clásico en tempdir.
+        """
+        try:
+            diff_content = cls._as_text(diff_content)
+            for path, new_source in cls._iter_patched_sources(diff_content,
+                                                              repo_root):
+                if not path.endswith(".py"):
+                    continue
+                try:
+                    compile(new_source, path, "exec")
+                except SyntaxError:
+                    return False
+            return True
+        except Exception:
+            return cls._syntax_check_on_disk(diff_content)
+
     @classmethod
-    def _syntax_check(cls, diff_content: str) -> bool:
-        """PASO 3: Validar sintaxis del diff aplicado"""
+    def _syntax_check_on_disk(cls, diff_content: str) -> bool:
+        """Fallback: aplicar el diff a un tempdir y compilar los .py"""
         try:
-            # Crear directorio temporal para prueba
-            with tempfile.TemporaryDirectory() as temp_dir:
+            # Directorio temporal en RAM cuando hay /dev/shm: el dry-run
+            # se borra en milisegundos, que nunca toque el disco
+            shm = "/dev/shm" if os.path.isdir("/dev/shm") else None
+            with tempfile.TemporaryDirectory(dir=shm) as temp_dir:
                 temp_path = Path(temp_dir)
                 
                 # Aplicar diff a copia temporal
@@ -218,55 +433,76 @@ class CriticalMemoryRules:
             return False
     
     @classmethod
-    def _apply_changes(cls, diff_content: str) -> bool:
-        """PASO 4: Aplicar diff al filesystem real"""
+    def _apply_changes(cls, diff_content: str,
+                       repo_root: Optional[Path] = None) -> bool:
+        """
+        PASO 4: Aplicar diff al filesystem real.
+
+        MEJORA: un solo proceso git apply --index en vez del par
+        --check + apply (dos fork+exec por propuesta). apply --index ya
+        es transaccional — si falla a mitad no toca el índice — y el
+        rollback por snapshot de atomic_change cubre el resto.
+        """
         try:
-            # Usar git apply para aplicar diff de forma segura
-            process = subprocess.Popen(
-                ["git", "apply", "--check", "-"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            _, stderr = process.communicate(input=diff_content)
-            
-            if process.returncode != 0:
-                return False
-            
-            # Si pasa el check, aplicar realmente
-            process = subprocess.Popen(
-                ["git", "apply", "-"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+            result = subprocess.run(
+                ["git", "apply", "--index", "-"],
+                input=cls._as_text(diff_content),
+                capture_output=True,
+                text=True,
+                cwd=repo_root
             )
-            
-            _, stderr = process.communicate(input=diff_content)
-            
-            return process.returncode == 0
-            
+            return result.returncode == 0
         except Exception:
             return False
     
     @classmethod
-    def _run_tests(cls, test_plan: str) -> Dict[str, any]:
-        """PASO 5: Ejecutar plan de tests especificado"""
+    def _run_tests(cls, test_plan: str,
+                   repo_root: Optional[Path] = None,
+                   runner: Optional[Callable[[List[str]], int]] = None
+                   ) -> Dict[str, any]:
+        """
+        PASO 5: Ejecutar plan de tests especificado.
+
+        runner: callable argv -> returncode, inyectable. Por defecto se
+        usa un subprocess pytest; los tests (o un caller que ya tenga
+        pytest importado) pueden inyectar p.ej. pytest.main para correr
+        en-proceso y ahorrarse el fork + redescubrimiento de plugins.
+        """
         try:
             # Parsear comandos pytest del plan
             if not test_plan.startswith("pytest"):
                 return {"passed": False, "failures": "Invalid test plan format"}
-            
-            # Ejecutar tests
+
+            cmd = test_plan.split()
+            # MEJORA: paralelizar entre núcleos si pytest-xdist está
+            # instalado, y recortar el volumen de salida por el pipe;
+            # solo se inyectan flags que el plan no trae ya
+            if (importlib.util.find_spec("xdist") is not None
+                    and "-n" not in cmd):
+                cmd[1:1] = ["-n", "auto"]
+            for flag in ("--tb=line", "--no-header"):
+                if flag not in cmd:
+                    cmd.insert(1, flag)
+
+            # Ejecutar tests: runner inyectado (en-proceso, sin fork) o
+            # subprocess por defecto
+            if runner is not None:
+                returncode = runner(cmd[1:])
+                return {
+                    "passed": returncode == 0,
+                    "stdout": "",
+                    "stderr": "",
+                    "failures": f"exit code {returncode}" if returncode else ""
+                }
+
             result = subprocess.run(
-                test_plan.split(),
+                cmd,
                 capture_output=True,
                 text=True,
-                timeout=300  # 5 minutos máximo
+                timeout=300,  # 5 minutos máximo
+                cwd=repo_root
             )
-            
+
             return {
                 "passed": result.returncode == 0,
                 "stdout": result.stdout,
@@ -280,33 +516,143 @@ class CriticalMemoryRules:
             return {"passed": False, "failures": f"Test execution error: {str(e)}"}
     
     @classmethod
-    def _rollback(cls, snapshot_id: str, reason: str, snapshot: Snapshot) -> Tuple[ChangeStatus, str]:
+    def _diff_touched_paths(cls, diff_content: str) -> set:
+        """Rutas (origen y destino) que aparecen en las cabeceras del diff"""
+        lines = cls._as_text(diff_content).splitlines()
+        touched = set()
+        for i, line in enumerate(lines[:-1]):
+            match = cls._DIFF_SOURCE_RE.match(line)
+            if match and cls._DIFF_FILE_RE.match(lines[i + 1]):
+                touched.add(match.group(1))
+                touched.add(cls._DIFF_FILE_RE.match(lines[i + 1]).group(1))
+        touched.discard("/dev/null")
+        return touched
+
+    @classmethod
+    def _can_git_snapshot(cls, diff_content: str,
+                          repo_root: Optional[Path] = None) -> bool:
+        """
+        ¿Sirve HEAD como punto de restauración para este diff?
+
+        Requiere worktree totalmente limpio (git reset --hard + clean -fd
+        no pueden llevarse nada ajeno) y que todo archivo preexistente
+        que toque el diff esté rastreado por git.
+        """
+        try:
+            root = Path(repo_root) if repo_root is not None else Path.cwd()
+            status = subprocess.run(["git", "status", "--porcelain"],
+                                    capture_output=True, text=True, timeout=10,
+                                    cwd=root)
+            if status.returncode != 0 or status.stdout.strip():
+                return False
+            touched = cls._diff_touched_paths(diff_content)
+            if not touched:
+                return False
+            for rel in touched:
+                if not (root / rel).exists():
+                    continue  # lo crea el diff: reset --hard + clean lo quita
+                tracked = subprocess.run(
+                    ["git", "ls-files", "--error-unmatch", "--", rel],
+                    capture_output=True, timeout=10, cwd=root)
+                if tracked.returncode != 0:
+                    return False
+            return True
+        except Exception:
+            return False
+
+    @classmethod
+    def _git_snapshot(cls, repo_root: Optional[Path] = None) -> Snapshot:
+        """Snapshot lógico: HEAD es el estado a restaurar, cero copias"""
+        root = Path(repo_root) if repo_root is not None else Path.cwd()
+        head = subprocess.run(["git", "rev-parse", "HEAD"],
+                              capture_output=True, text=True, cwd=root)
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        return Snapshot(
+            snapshot_id=f"gitsnap_{timestamp}",
+            timestamp=datetime.utcnow().isoformat(),
+            source_path=str(root),
+            backup_path=cls._GIT_SNAPSHOT,
+            file_count=0,
+            checksum=head.stdout.strip()
+        )
+
+    @classmethod
+    def _restore_touched_paths(cls, diff_content: str, backup_path: Path,
+                               source_path: Path) -> bool:
+        """
+        Rollback dirigido: revertir SOLO los archivos que toca el diff.
+
+        VENTAJA: trabajo proporcional al tamaño del diff, no al del
+        proyecto — un diff de 5 archivos no paga limpiar y re-copiar el
+        árbol entero. Devuelve False si el diff no se puede interpretar
+        (el caller cae al restore completo).
+        """
+        try:
+            touched = cls._diff_touched_paths(diff_content)
+            if not touched:
+                return False
+
+            for rel in touched:
+                backup_file = backup_path / rel
+                dest = source_path / rel
+                if backup_file.exists():
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    cls._link_or_copy(backup_file, dest)
+                elif dest.exists():
+                    # Creado por el diff: no existía en el snapshot
+                    dest.unlink()
+
+            # Des-stagear lo que git apply --index dejó en el índice
+            subprocess.run(["git", "reset", "--quiet"], capture_output=True,
+                           cwd=source_path)
+            return True
+        except Exception:
+            return False
+
+    @classmethod
+    def _rollback(cls, snapshot_id: str, reason: str, snapshot: Snapshot,
+                  diff_content: Optional[str] = None,
+                  repo_root: Optional[Path] = None) -> Tuple[ChangeStatus, str]:
         """Revertir a snapshot en caso de fallo"""
         try:
+            source_path = (Path(repo_root) if repo_root is not None
+                           else Path.cwd())
+
+            if snapshot.backup_path == cls._GIT_SNAPSHOT:
+                # El worktree estaba limpio al crear el snapshot lógico:
+                # volver a HEAD y barrer lo que el diff haya creado
+                subprocess.run(["git", "reset", "--hard", "HEAD"],
+                               capture_output=True, check=True,
+                               cwd=source_path)
+                subprocess.run(["git", "clean", "-fd"], capture_output=True,
+                               cwd=source_path)
+                return (ChangeStatus.ROLLBACK,
+                        f"Rolled back to {snapshot_id}. Reason: {reason}")
+
             backup_path = Path(snapshot.backup_path)
-            source_path = Path.cwd()
 
             if not backup_path.exists():
                 return (ChangeStatus.FAILED, f"Rollback failed: snapshot not found {snapshot_id}")
 
-            # Limpiar directorio actual (preservar .git y core)
-            for item in source_path.iterdir():
-                if item.name in [".git", "core"]:
-                    continue
-                if item.is_file():
-                    item.unlink()
-                else:
-                    shutil.rmtree(item)
+            restored = False
+            if diff_content:
+                restored = cls._restore_touched_paths(
+                    diff_content, backup_path, source_path)
 
-            # Restaurar desde backup
-            rsync_cmd = [
-                "rsync", "-av", "--exclude", ".git", "--exclude", "core",
-                f"{backup_path}/", f"{source_path}/"
-            ]
+            if not restored:
+                # Restore completo: limpiar directorio actual
+                # (preservar .git y core) y re-copiar desde el backup
+                for item in source_path.iterdir():
+                    if item.name in [".git", "core"]:
+                        continue
+                    if item.is_file():
+                        item.unlink()
+                    else:
+                        shutil.rmtree(item)
 
-            result = subprocess.run(rsync_cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                return (ChangeStatus.FAILED, f"Rollback rsync failed: {result.stderr}")
+                cls._copy_tree(backup_path, source_path,
+                               cls.RESTORE_EXCLUDE_DIRS,
+                               copy_function=cls._link_or_copy)
 
             # Limpiar snapshot después de rollback exitoso
             shutil.rmtree(backup_path)
@@ -317,36 +663,74 @@ class CriticalMemoryRules:
             return (ChangeStatus.FAILED, f"Critical rollback failure: {str(e)}")
     
     @classmethod
-    def _commit_changes(cls, proposal_id: str, title: str) -> None:
+    def _commit_changes(cls, proposal_id: str, title: str,
+                        repo_root: Optional[Path] = None) -> None:
         """Confirmar cambios con commit git"""
         try:
             # Añadir todos los cambios
-            subprocess.run(["git", "add", "."], capture_output=True, check=True)
+            subprocess.run(["git", "add", "."], capture_output=True, check=True,
+                           cwd=repo_root)
             
             # Crear commit
             commit_msg = f"{proposal_id}: {title}\n\nAuto-implemented by Aipha Fase 0"
             subprocess.run(
                 ["git", "commit", "-m", commit_msg],
                 capture_output=True,
-                check=True
+                check=True,
+                cwd=repo_root
             )
         except Exception:
             # Silenciar errores de git para no bloquear el flujo
             pass
     
+    @classmethod
+    def _hash_file(cls, file_path: Path) -> Optional[bytes]:
+        """Hash de un archivo en chunks de 1 MiB (memoria acotada)"""
+        try:
+            hasher = _new_hasher()
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    hasher.update(chunk)
+            return hasher.digest()
+        except Exception:
+            return None
+
     @classmethod
     def _calculate_directory_checksum(cls, directory: Path) -> str:
-        """Calcular checksum MD5 de todo el directorio"""
-        hasher = hashlib.md5()
-        
-        for file_path in sorted(directory.rglob("*")):
-            if file_path.is_file() and not file_path.name.startswith("."):
-                try:
-                    with open(file_path, "rb") as f:
-                        hasher.update(f.read())
-                except Exception:
-                    continue
-        
+        """
+        Checksum del directorio (blake3 si está instalado; si no SHA-256).
+
+        VENTAJA: cada archivo se hashea en chunks (nunca se carga entero
+        en RAM) y en paralelo con un ThreadPoolExecutor — hashlib suelta
+        el GIL durante update, así el throughput escala con el disco.
+        SHA-256 despacha a las extensiones SHA-NI del CPU vía OpenSSL,
+        varias veces más rápido que el MD5 escalar que reemplaza. El
+        agregado es estilo Merkle: hash final sobre los pares ordenados
+        (ruta relativa, digest), insensible al orden de llegada.
+        """
+        files = (
+            Path(entry.path) for entry in cls._iter_files(directory)
+            if not entry.name.startswith(".")
+        )
+        return cls._checksum_from_files(directory, files)
+
+    @classmethod
+    def _checksum_from_files(cls, directory: Path, files) -> str:
+        """Checksum Merkle sobre una lista de archivos ya enumerada"""
+        files = sorted(files)
+        if not files:
+            return _new_hasher().hexdigest()
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            digests = list(pool.map(cls._hash_file, files))
+
+        hasher = _new_hasher()
+        for file_path, digest in zip(files, digests):
+            if digest is None:
+                continue
+            rel_path = str(file_path.relative_to(directory))
+            hasher.update(rel_path.encode() + b"\0" + digest)
+
         return hasher.hexdigest()
     
     @classmethod
@@ -0,0 +1,155 @@
+"""
+Tests para PotentialCaptureEngine - Etiquetado TP/SL
+FASE 0: Test del motor de captura de potencial
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Añadir root al path para importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from core.potential_capture_engine import PotentialCaptureEngine
+
+
+def _make_prices(closes):
+    """DataFrame OHLC sintético con high/low = close +/- 0.5"""
+    closes = np.asarray(closes, dtype=np.float64)
+    index = pd.date_range("2025-01-01", periods=len(closes), freq="min")
+    return pd.DataFrame({
+        "high": closes + 0.5,
+        "low": closes - 0.5,
+        "close": closes,
+    }, index=index)
+
+
+class TestPotentialCaptureEngine:
+    """Test suite del etiquetado vectorizado de eventos"""
+
+    def test_take_profit_label(self):
+        """TP tocado dentro de la ventana → etiqueta +1"""
+        prices = _make_prices([100, 100, 103, 103, 103])
+        engine = PotentialCaptureEngine(tp_factor=0.02, sl_factor=0.05,
+                                        time_limit=4)
+        labels = engine.label_events(prices, prices.index[:1])
+        assert labels.iloc[0] == 1
+        assert labels.dtype == np.int8
+
+    def test_stop_loss_label(self):
+        """SL tocado dentro de la ventana → etiqueta -1"""
+        prices = _make_prices([100, 100, 97, 97, 97])
+        engine = PotentialCaptureEngine(tp_factor=0.05, sl_factor=0.02,
+                                        time_limit=4)
+        labels = engine.label_events(prices, prices.index[:1])
+        assert labels.iloc[0] == -1
+
+    def test_timeout_label(self):
+        """Sin tocar barreras dentro de time_limit → etiqueta 0"""
+        prices = _make_prices([100, 100, 100, 100, 100])
+        engine = PotentialCaptureEngine(tp_factor=0.05, sl_factor=0.05,
+                                        time_limit=3)
+        labels = engine.label_events(prices, prices.index[:1])
+        assert labels.iloc[0] == 0
+
+    def test_tie_resolves_to_stop_loss(self):
+        """TP y SL en la misma barra → -1 (criterio conservador)"""
+        prices = _make_prices([100, 100, 100])
+        # Barra 1 toca ambas barreras a la vez
+        prices.loc[prices.index[1], "high"] = 105
+        prices.loc[prices.index[1], "low"] = 95
+        engine = PotentialCaptureEngine(tp_factor=0.02, sl_factor=0.02,
+                                        time_limit=2)
+        labels = engine.label_events(prices, prices.index[:1])
+        assert labels.iloc[0] == -1
+
+    def test_event_near_end_of_series(self):
+        """Evento con ventana incompleta no revienta ni etiqueta de más"""
+        prices = _make_prices([100, 100])
+        engine = PotentialCaptureEngine(tp_factor=0.05, sl_factor=0.05,
+                                        time_limit=20)
+        labels = engine.label_events(prices, prices.index)
+        assert list(labels) == [0, 0]
+
+    def test_unknown_events_dropped(self):
+        """Timestamps fuera del índice de precios se descartan"""
+        prices = _make_prices([100, 100, 103])
+        engine = PotentialCaptureEngine(tp_factor=0.02, sl_factor=0.05,
+                                        time_limit=2)
+        foreign = pd.DatetimeIndex(["2030-01-01"])
+        labels = engine.label_events(prices,
+                                     prices.index[:1].append(foreign))
+        assert len(labels) == 1
+        assert labels.iloc[0] == 1
+
+    def test_many_events_vectorized(self):
+        """Lote de eventos: etiquetas coherentes con el escaneo escalar"""
+        rng = np.random.default_rng(42)
+        closes = 100 + np.cumsum(rng.normal(0, 0.5, size=500))
+        prices = _make_prices(closes)
+        engine = PotentialCaptureEngine(tp_factor=0.01, sl_factor=0.01,
+                                        time_limit=10)
+        events = prices.index[::7]
+        labels = engine.label_events(prices, events)
+
+        # Referencia escalar (mismo criterio de empate)
+        for ts, got in labels.items():
+            i = prices.index.get_loc(ts)
+            entry = prices["close"].iloc[i]
+            expected = 0
+            for j in range(i + 1, min(i + 1 + 10, len(prices))):
+                sl = prices["low"].iloc[j] <= entry * 0.99
+                tp = prices["high"].iloc[j] >= entry * 1.01
+                if sl:
+                    expected = -1
+                    break
+                if tp:
+                    expected = 1
+                    break
+            assert got == expected, ts
+
+    def test_analyze_output_counts(self):
+        """Distribución de etiquetas en una pasada (bincount)"""
+        labels = pd.Series([1, -1, 0, 1, 1, 0])
+        stats = PotentialCaptureEngine.analyze_output(labels)
+        assert stats['num_events'] == 6
+        assert (stats['tp'], stats['sl'], stats['timeout']) == (3, 1, 2)
+        assert stats['tp_pct'] == pytest.approx(50.0)
+
+    def test_analyze_output_empty(self):
+        """Serie vacía no divide por cero"""
+        stats = PotentialCaptureEngine.analyze_output(
+            pd.Series([], dtype=np.int64))
+        assert stats['num_events'] == 0
+        assert stats['tp_pct'] == 0.0
+
+    def test_mutated_prices_not_served_stale(self):
+        """Reasignar una columna invalida el cache SoA de _prepare"""
+        prices = _make_prices([100, 100, 100, 100, 100])
+        engine = PotentialCaptureEngine(tp_factor=0.02, sl_factor=0.05,
+                                        time_limit=4)
+        assert engine.label_events(prices, prices.index[:1]).iloc[0] == 0
+
+        # Mismo objeto, misma longitud, mismos extremos del índice:
+        # solo cambia el buffer de la columna
+        prices['high'] = prices['high'].to_numpy() + 10
+        assert engine.label_events(prices, prices.index[:1]).iloc[0] == 1
+
+    def test_invalidate_after_inplace_write(self):
+        """Escritura in-place sobre el mismo buffer + invalidate()"""
+        prices = _make_prices([100, 100, 100, 100, 100])
+        engine = PotentialCaptureEngine(tp_factor=0.02, sl_factor=0.05,
+                                        time_limit=4)
+        assert engine.label_events(prices, prices.index[:1]).iloc[0] == 0
+
+        # .loc escribe sobre el mismo buffer del bloque (mismo puntero,
+        # datos nuevos): el caso que la huella de _prepare no puede ver
+        prices.loc[prices.index[1], 'high'] = 120.0
+        engine.invalidate()
+        assert engine.label_events(prices, prices.index[:1]).iloc[0] == 1
+
+    def test_invalid_time_limit(self):
+        """time_limit < 1 se rechaza"""
+        with pytest.raises(ValueError):
+            PotentialCaptureEngine(time_limit=0)